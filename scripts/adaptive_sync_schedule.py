@@ -0,0 +1,49 @@
+class AdaptiveSyncSchedule:
+    """
+    Decide when the calendar sync polls next and when it has to reconcile.
+
+    Polls are cheap conditional requests. The interval drops to min_interval
+    whenever a feed changed and doubles on every quiet poll up to max_interval.
+    A full reconcile runs when a feed changed, when an occurrence has entered
+    the sync window since the last reconcile, or at least every
+    reconcile_interval as a consistency check. The next poll is pulled forward
+    to the next window entry and to just before the next occurrence start.
+    """
+
+    def __init__(self, min_interval=60, max_interval=15 * 60, reconcile_interval=60 * 60,
+                 boundary_lead=60, min_wake=15):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.reconcile_interval = reconcile_interval
+        self.boundary_lead = boundary_lead
+        self.min_wake = min_wake
+        self.interval = min_interval
+        self.last_reconcile = None
+        self.next_entry = None
+
+    def reconcile_due(self, now, changed):
+        """True when this poll must be followed by a full reconcile."""
+        return (
+            changed or
+            self.last_reconcile is None or
+            (now - self.last_reconcile).total_seconds() >= self.reconcile_interval or
+            (self.next_entry is not None and now >= self.next_entry)
+        )
+
+    def record(self, now, changed, reconciled, next_entry=None, next_start=None):
+        """Record a poll's outcome and return the delay in seconds until the next one."""
+        if reconciled:
+            self.last_reconcile = now
+            self.next_entry = next_entry
+        self.interval = self.min_interval if changed else min(self.max_interval, self.interval * 2)
+
+        delay = self.interval
+        if self.next_entry is not None:
+            # Wake right as the next occurrence enters the window
+            delay = min(delay, max(self.min_wake, (self.next_entry - now).total_seconds()))
+        if next_start is not None:
+            # Poll once just before the next occurrence starts
+            until_lead = (next_start - now).total_seconds() - self.boundary_lead
+            if until_lead > 0:
+                delay = min(delay, max(self.min_wake, until_lead))
+        return delay
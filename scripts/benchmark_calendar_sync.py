@@ -0,0 +1,158 @@
+"""
+Offline benchmark for the calendar sync.
+
+Runs the sync pipeline on synthetic ICS feeds (see synthetic_ics) or saved
+feeds against an in-process FakeGuild (see fake_guild), and reports for
+each phase the wall time, the peak traced memory and the Discord API calls:
+
+    parse        Calendar.from_ical on every feed
+    parse-window Calendar.from_ical on the events that can intersect the window (ics_window)
+    expand       expand_calendar (parse and expand) with a cold recurrence cache
+    expand-warm  expand_calendar an hour later, with the recurrence cache warm
+    sync-initial reconcile into an empty guild (all creates)
+    sync-steady  reconcile again with nothing changed
+    sync-changed reconcile after renaming and deleting some Discord events
+
+Nothing touches the network or Discord; the mapping store, feed cache and
+log file are written to a temporary directory.
+
+Usage:
+    python benchmark_calendar_sync.py [saved_feed.ics ...] [--one-offs N] [--series N]
+                                      [--overrides N] [--feeds N] [--latency SECONDS]
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import argparse
+import tempfile
+import tracemalloc
+from collections import Counter
+
+import pendulum
+from icalendar import Calendar
+
+from discord_write_queue import DiscordWriteQueue
+from event_mapping_store import EventMappingStore
+from fake_guild import FakeGuild
+from ics_feed_cache import select_window
+from ics_window import window_ics
+from recurrence_cache import RecurrenceCache
+from scheduled_event_index import ScheduledEventIndex
+from synthetic_ics import generate_ics
+
+
+async def run_phases(sync, feeds, latency, trace_memory):
+    """Run every phase once; returns [(phase, seconds, peak bytes or None, api calls)]."""
+    results = []
+    guild = FakeGuild(latency=latency)
+
+    async def phase(name, work):
+        calls_before = Counter(guild.calls)
+        if trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        result = await work() if asyncio.iscoroutinefunction(work) else work()
+        elapsed = time.perf_counter() - started
+        peak = None
+        if trace_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        results.append((name, elapsed, peak, guild.calls - calls_before))
+        return result
+
+    now = pendulum.now('UTC')
+    future = now.add(days=sync.SYNC_DAYS)
+    horizon = future.add(days=sync.EXPANSION_HORIZON_DAYS)
+    sync.RECURRENCE_CACHE = RecurrenceCache()
+
+    await phase('parse', lambda: [Calendar.from_ical(content) for content in feeds])
+    await phase('parse-window', lambda: [
+        Calendar.from_ical(window_ics(content, now, horizon)) for content in feeds
+    ])
+    expanded = await phase('expand', lambda: [sync.expand_calendar(content, now, horizon) for content in feeds])
+    later = now.add(hours=1)
+    await phase('expand-warm', lambda: [
+        sync.expand_calendar(content, later, horizon.add(hours=1)) for content in feeds
+    ])
+
+    snapshot = {
+        'events': [event for events, _ in expanded for event in select_window(events, now, future)],
+        'canceled_events': [event for _, canceled in expanded for event in select_window(canceled, now, future)],
+        'changed': True,
+        'next_entry': None,
+    }
+
+    async def reconcile():
+        await sync.sync_discord_events(guild, snapshot=snapshot)
+        await sync.WRITE_QUEUE.join()
+
+    await phase('sync-initial', reconcile)
+    await phase('sync-steady', reconcile)
+
+    # Simulate manual changes on Discord: rename every 10th event, delete every 20th,
+    # updating the index and mapping store as the gateway listeners would
+    for i, event in enumerate(list(guild.events.values())):
+        if i % 20 == 0:
+            del guild.events[event.id]
+            sync.EVENT_INDEX.remove(event)
+        elif i % 10 == 0:
+            event.name += ' (edited)'
+            sync.EVENT_INDEX.upsert(event)
+        else:
+            continue
+        sync.EVENT_STORE.invalidate(guild.id, event.id)
+    await phase('sync-changed', reconcile)
+
+    return results, len(snapshot['events']), len(guild.events)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline benchmark for the calendar sync.')
+    parser.add_argument('feeds', nargs='*', help='saved ICS files; synthetic feeds when omitted')
+    parser.add_argument('--one-offs', type=int, default=1000)
+    parser.add_argument('--series', type=int, default=150)
+    parser.add_argument('--overrides', type=int, default=10, help='overrides/cancellations per series')
+    parser.add_argument('--feeds', dest='feed_count', type=int, default=2, help='number of synthetic feeds')
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated seconds per Discord API call')
+    args = parser.parse_args()
+
+    feeds = [open(path, 'rb').read() for path in args.feeds]
+    if not feeds:
+        feeds = [
+            generate_ics(args.one_offs, args.series, args.overrides, seed=seed)
+            for seed in range(args.feed_count)
+        ]
+
+    # Import the sync module from a scratch directory, so its log file,
+    # mapping store and feed cache never touch the real ones
+    workdir = tempfile.mkdtemp(prefix='calendar-bench-')
+    os.chdir(workdir)
+    sys.argv = sys.argv[:1]
+    import sync_multiple_google_calendars_to_discord_events as sync
+    logging.getLogger().setLevel(logging.WARNING)
+
+    # Timings without tracemalloc, then a second pass for peak memory
+    timed, occurrences, discord_events = asyncio.run(run_phases(sync, feeds, args.latency, False))
+    queue_stats = dict(sync.WRITE_QUEUE.stats)
+    sync.EVENT_STORE = EventMappingStore(os.path.join(workdir, 'memory_pass.db'))
+    sync.EVENT_INDEX = ScheduledEventIndex(sync.discord_event_key)
+    sync.WRITE_QUEUE = DiscordWriteQueue()
+    sync.SYNC_LOCKS = {}
+    traced, _, _ = asyncio.run(run_phases(sync, feeds, args.latency, True))
+
+    print(
+        f"{len(feeds)} feed(s), {sum(len(content) for content in feeds) / 1024:.0f} KiB, "
+        f"{occurrences} occurrences in the {sync.SYNC_DAYS} day window, "
+        f"{discord_events} Discord events at the end"
+    )
+    print(f"{'phase':<14}{'time':>11}{'peak mem':>12}  api calls")
+    for (name, elapsed, _, calls), (_, _, peak, _) in zip(timed, traced):
+        call_summary = ', '.join(f"{kind} {count}" for kind, count in sorted(calls.items())) or '-'
+        print(f"{name:<14}{elapsed * 1000:>8.1f} ms{peak / 2**20:>8.1f} MiB  {call_summary}")
+    print(f"write queue: {queue_stats}")
+
+
+if __name__ == '__main__':
+    main()
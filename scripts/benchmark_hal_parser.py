@@ -0,0 +1,93 @@
+"""
+Microbenchmark for the HAL page parser.
+
+Compares the original scrape (a full BeautifulSoup html.parser tree plus
+get_text() for the status and table, and a second BeautifulSoup parse for the
+SVG) with hal_parser.parse_hal_page on saved copies of the HAL page.
+
+Usage:
+    python benchmark_hal_parser.py [saved_hal_page.html ...] [--repeat N]
+
+Save pages with e.g. `curl -o hal.html https://www.maglaboratory.org/hal`.
+Without arguments a synthetic page of similar shape is used.
+"""
+import sys
+import timeit
+
+from bs4 import BeautifulSoup
+
+import hal_parser
+from hal_parser import SYNOPTIC_SVG_ID, parse_hal_page
+
+
+def original_parse(html):
+    """The scrape as it was done before hal_parser, for comparison."""
+    soup = BeautifulSoup(html, 'html.parser')
+    page_text = soup.get_text().lower()
+    lab_status = (
+        "We are OPEN"
+        if 'open' in page_text and 'closed' not in page_text
+        else "We are CLOSED"
+    )
+    rows = []
+    sensor_table = soup.find('table')
+    if sensor_table:
+        for row in sensor_table.find_all('tr'):
+            cells = row.find_all('td')
+            if len(cells) == 4:
+                rows.append([cell.get_text(strip=True) for cell in cells])
+    svg_soup = BeautifulSoup(html, 'lxml' if hal_parser.lxml_html is not None else 'html.parser')
+    svg_element = svg_soup.find('svg', {'id': SYNOPTIC_SVG_ID})
+    return lab_status, rows, str(svg_element) if svg_element else None
+
+
+def synthetic_page(sensor_count=14, shape_count=400):
+    """Build a page shaped like HAL: a status line, a sensor table and a large SVG."""
+    rows = ''.join(
+        f'<tr><td>Sensor {i}</td><td>{20 + i}.0 °C / {68 + i}.0 °F</td><td>ok</td>'
+        f'<td>Oct 17, 2026, 01:{i:02d} AM PDT</td></tr>'
+        for i in range(sensor_count)
+    )
+    shapes = ''.join(
+        f'<g><rect x="{i}" y="{i}" width="10" height="10" style="fill:#0f0"/>'
+        f'<text x="{i}" y="{i}" style="font-family:DejaVu Sans, sans-serif;">Zone {i}</text></g>'
+        for i in range(shape_count)
+    )
+    scripts = '<script>var x = "open closed";</script>' * 20
+    return (
+        '<html><head><title>HAL</title>' + scripts + '</head><body>'
+        '<div id="lab-status">MAG Laboratory is Open</div>'
+        '<table><tr><th>Sensor</th><th>Status</th><th>Detail</th><th>Last Update</th></tr>'
+        + rows + '</table>'
+        f'<svg id="{SYNOPTIC_SVG_ID}" width="1000" height="1000">' + shapes + '</svg>'
+        '</body></html>'
+    ).encode('utf-8')
+
+
+def main(argv):
+    repeat = 20
+    if '--repeat' in argv:
+        index = argv.index('--repeat')
+        repeat = int(argv[index + 1])
+        argv = argv[:index] + argv[index + 2:]
+
+    pages = [(path, open(path, 'rb').read()) for path in argv]
+    if not pages:
+        pages = [('<synthetic>', synthetic_page())]
+
+    backend = 'lxml' if hal_parser.lxml_html is not None else 'html.parser (lxml not installed)'
+    print(f"hal_parser backend: {backend}, {repeat} runs per page")
+    for name, html in pages:
+        original = min(timeit.repeat(lambda: original_parse(html), number=1, repeat=repeat))
+        targeted = min(timeit.repeat(lambda: parse_hal_page(html), number=1, repeat=repeat))
+        result = parse_hal_page(html)
+        print(
+            f"{name} ({len(html) / 1024:.0f} KiB): original {original * 1000:.2f} ms, "
+            f"hal_parser {targeted * 1000:.2f} ms ({original / targeted:.1f}x), "
+            f"{result.lab_status}, {len(result.sensors)} sensors, "
+            f"svg {'found' if result.svg else 'missing'}"
+        )
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,103 @@
+import logging
+import datetime
+
+SYNC_DAYS = 7  # Default sync horizon of a feed
+DESCRIPTION_MAX_LENGTH = 1000  # Discord's limit for event descriptions
+DEFAULT_LOCATION = 'MAG Laboratory'
+
+# Feeds fetched per poll at most; further due feeds wait for the next poll, highest priority first
+MAX_FEEDS_PER_POLL = 8
+
+# Used when bot_config.json has no "calendars" list
+DEFAULT_CALENDARS = [
+    {
+        'url': 'https://calendar.google.com/calendar/ical/c_3keov3j3lc5qscq754mb4n38b4%40group.calendar.google.com/public/basic.ics',
+        'priority': 10,
+    },
+    {
+        'url': 'https://calendar.google.com/calendar/ical/bjpkvaeg1rjq9u3c6utecq1jos%40group.calendar.google.com/public/basic.ics',
+    },
+]
+
+
+class CalendarFeed:
+    """
+    One ICS feed of the calendar registry and its sync settings.
+
+    The feed is polled every min_refresh seconds while it keeps changing,
+    backing off to max_refresh while it is quiet. Occurrences are synced
+    sync_days ahead, events without a LOCATION get location, and
+    descriptions are cut to description_max_length characters.
+    """
+
+    __slots__ = ('url', 'name', 'min_refresh', 'max_refresh', 'sync_days', 'location', 'priority',
+                 'description_max_length')
+
+    def __init__(self, url, name=None, min_refresh=60, max_refresh=15 * 60, sync_days=SYNC_DAYS,
+                 location=DEFAULT_LOCATION, priority=0, description_max_length=DESCRIPTION_MAX_LENGTH):
+        if not url:
+            raise ValueError("a calendar needs a url")
+        self.url = url
+        self.name = name or url
+        self.min_refresh = float(min_refresh)
+        self.max_refresh = max(float(max_refresh), self.min_refresh)
+        self.sync_days = int(sync_days)
+        self.location = location
+        self.priority = int(priority)
+        self.description_max_length = min(int(description_max_length), DESCRIPTION_MAX_LENGTH)
+
+    def expansion_settings(self):
+        """Settings baked into an expanded feed; cached expansions made with others are redone."""
+        return {'location': self.location, 'description_max_length': self.description_max_length}
+
+
+def load_calendars(entries):
+    """Build the registry from config entries (dicts of CalendarFeed arguments), skipping invalid ones."""
+    calendars = []
+    for entry in entries or DEFAULT_CALENDARS:
+        try:
+            calendars.append(CalendarFeed(**entry))
+        except (TypeError, ValueError) as e:
+            logging.error(f"Skipping invalid calendar entry {entry}: {e}")
+    return calendars
+
+
+class FeedScheduler:
+    """
+    Decide which feeds a poll downloads.
+
+    Each feed has its own refresh interval: min_refresh after it changed or
+    failed, doubling on every unchanged refresh up to max_refresh. A poll
+    refreshes at most max_per_poll of the due feeds, highest priority first
+    and then the most overdue; feeds that are not refreshed are served from
+    the feed cache.
+    """
+
+    def __init__(self, max_per_poll=MAX_FEEDS_PER_POLL):
+        self.max_per_poll = max_per_poll
+        self._intervals = {}  # URL -> current refresh interval in seconds
+        self._next_refresh = {}  # URL -> time of the next refresh
+
+    def due(self, calendars, now):
+        """The feeds to refresh in this poll."""
+        due = [feed for feed in calendars if now >= self._next_refresh.get(feed.url, now)]
+        due.sort(key=lambda feed: (-feed.priority, self._next_refresh.get(feed.url, now)))
+        return due[:self.max_per_poll]
+
+    def record(self, feed, now, changed):
+        """Record a refresh of feed; changed is also True for a failed refresh, so it is retried soon."""
+        interval = self._intervals.get(feed.url)
+        if changed or interval is None:
+            interval = feed.min_refresh
+        else:
+            interval = min(feed.max_refresh, interval * 2)
+        self._intervals[feed.url] = interval
+        self._next_refresh[feed.url] = now + datetime.timedelta(seconds=interval)
+
+    def seconds_until_next(self, calendars, now):
+        """Seconds until the next feed is due; 0 if one is due already."""
+        waits = [
+            (self._next_refresh[feed.url] - now).total_seconds() if feed.url in self._next_refresh else 0
+            for feed in calendars
+        ]
+        return max(0.0, min(waits)) if waits else None
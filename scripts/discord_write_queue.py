@@ -0,0 +1,224 @@
+import random
+import asyncio
+import logging
+from collections import Counter
+
+import discord
+
+from metrics import DISCORD_API_CALLS, DISCORD_API_SECONDS, DISCORD_RATE_LIMITED
+
+# discord.py itself retries 500, 502, 504 and 524, and sleeps through 429s up
+# to the client's max_ratelimit_timeout; the queue retries what reaches it
+RETRYABLE_STATUSES = {429, 503}
+
+# Longest rate-limit wait discord.py sleeps through itself (the lowest it
+# accepts); longer ones are raised as discord.RateLimited and pause the route
+MAX_RATELIMIT_TIMEOUT = 30.0
+
+# HTTP method of a scheduled-event request -> write kind, for the 429 counter
+METHOD_KINDS = {'POST': 'create', 'PATCH': 'edit', 'DELETE': 'delete', 'GET': 'fetch'}
+
+
+class WriteOp:
+    """A queued scheduled-event write: create, edit or delete."""
+
+    __slots__ = ('kind', 'route', 'target', 'fields', 'event_id', 'future')
+
+    def __init__(self, kind, route, target, fields, event_id=None):
+        self.kind = kind
+        self.route = route
+        self.target = target
+        self.fields = fields
+        self.event_id = event_id
+        self.future = asyncio.get_running_loop().create_future()
+
+
+def retry_after_from(error):
+    """Return the server-requested wait, in seconds, for a rate-limit or server error."""
+    if isinstance(error, discord.RateLimited):
+        return error.retry_after
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        return float(headers.get('Retry-After') or headers.get('X-RateLimit-Reset-After') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class RateLimitCounter(logging.Filter):
+    """
+    Count the scheduled-event 429s that discord.py retries internally.
+
+    discord.py only logs those ("We are being rate limited. ... Retrying
+    in"), so this filter on the discord.http logger adds them to
+    DISCORD_RATE_LIMITED; the ones raised as discord.RateLimited are counted
+    by the queue. Records are never dropped.
+    """
+
+    def filter(self, record):
+        if (
+            isinstance(record.msg, str) and
+            record.msg.startswith('We are being rate limited.') and
+            'Retrying in' in record.msg and
+            len(record.args or ()) >= 2
+        ):
+            method, url = record.args[:2]
+            if '/scheduled-events' in str(url):
+                DISCORD_RATE_LIMITED.inc(kind=METHOD_KINDS.get(method, str(method).lower()))
+        return True
+
+
+class DiscordWriteQueue:
+    """
+    Shared queue for Discord scheduled-event writes.
+
+    Each guild has its own queue and bounded pool of workers, so a guild that
+    is throttled or failing only holds up its own writes. Each route (creates
+    per guild, edits/deletes per guild) is paused for the Retry-After Discord
+    sends on a 429, so one throttled route does not stall the others. A write that is
+    still queued is coalesced with later writes to the same event: edits merge
+    their fields, and a delete supersedes a pending edit. Rate limits too
+    long for discord.py to wait out (see MAX_RATELIMIT_TIMEOUT) and 503s are
+    retried with exponential backoff; other 5xx responses were already
+    retried by discord.py.
+    """
+
+    def __init__(self, max_concurrency=3, max_retries=5, base_backoff=1.0, max_backoff=60.0):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.stats = Counter()
+        self._queues = {}  # Guild ID -> asyncio.Queue
+        self._workers = {}  # Guild ID -> worker tasks
+        self._pending = {}
+        self._blocked_until = {}
+        self._event_locks = {}
+        self._event_lock_users = Counter()
+
+    def create(self, guild, **fields):
+        """Queue guild.create_scheduled_event(**fields); returns an awaitable for the new event."""
+        return self._submit(WriteOp('create', ('create', guild.id), guild, fields))
+
+    def edit(self, event, **fields):
+        """Queue event.edit(**fields); returns an awaitable for the edited event (None if superseded)."""
+        return self._submit(WriteOp('edit', ('event', event.guild_id), event, dict(fields), event.id))
+
+    def delete(self, event):
+        """Queue event.delete(); returns an awaitable that resolves once the event is gone."""
+        return self._submit(WriteOp('delete', ('event', event.guild_id), event, {}, event.id))
+
+    async def join(self):
+        """Wait until every queued write, of every guild, has finished."""
+        await asyncio.gather(*(queue.join() for queue in list(self._queues.values())))
+
+    def _ensure_workers(self, guild_id):
+        queue = self._queues.get(guild_id)
+        if queue is None:
+            queue = self._queues[guild_id] = asyncio.Queue()
+        workers = [worker for worker in self._workers.get(guild_id, []) if not worker.done()]
+        while len(workers) < self.max_concurrency:
+            workers.append(asyncio.create_task(self._worker(queue)))
+        self._workers[guild_id] = workers
+        return queue
+
+    def _submit(self, op):
+        queue = self._ensure_workers(op.route[1])
+        pending = self._pending.get(op.event_id) if op.event_id is not None else None
+        if pending is not None:
+            self.stats['coalesced'] += 1
+            if pending.kind == 'delete':
+                # The event is about to be deleted; nothing left to do
+                op.future.set_result(None)
+                return op.future
+            if op.kind == 'edit':
+                pending.fields.update(op.fields)
+                return pending.future
+            # A delete supersedes the queued edit
+            superseded = pending.future
+            pending.kind, pending.fields, pending.future = 'delete', {}, op.future
+            superseded.set_result(None)
+            return op.future
+
+        if op.event_id is not None:
+            self._pending[op.event_id] = op
+        queue.put_nowait(op)
+        return op.future
+
+    async def _worker(self, queue):
+        while True:
+            op = await queue.get()
+            try:
+                if self._pending.get(op.event_id) is op:
+                    del self._pending[op.event_id]
+                result = await self._run_serialized(op)
+                if not op.future.done():
+                    op.future.set_result(result)
+            except Exception as e:
+                if not op.future.done():
+                    op.future.set_exception(e)
+            finally:
+                queue.task_done()
+
+    async def _run_serialized(self, op):
+        """Run an op, never concurrently with another op on the same event."""
+        if op.event_id is None:
+            return await self._run(op)
+        lock = self._event_locks.setdefault(op.event_id, asyncio.Lock())
+        self._event_lock_users[op.event_id] += 1
+        try:
+            async with lock:
+                return await self._run(op)
+        finally:
+            self._event_lock_users[op.event_id] -= 1
+            if not self._event_lock_users[op.event_id]:
+                del self._event_lock_users[op.event_id]
+                del self._event_locks[op.event_id]
+
+    async def _run(self, op):
+        with DISCORD_API_SECONDS.time(kind=op.kind):
+            return await self._run_with_retries(op)
+
+    async def _run_with_retries(self, op):
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            delay = self._blocked_until.get(op.route, 0) - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            try:
+                self.stats[op.kind] += 1
+                result = await self._call(op)
+                DISCORD_API_CALLS.inc(kind=op.kind, outcome='ok')
+                return result
+            except discord.NotFound:
+                DISCORD_API_CALLS.inc(kind=op.kind, outcome='404')
+                if op.kind == 'delete':
+                    return None  # Already gone
+                raise
+            except (discord.RateLimited, discord.HTTPException) as e:
+                status = 429 if isinstance(e, discord.RateLimited) else e.status
+                DISCORD_API_CALLS.inc(kind=op.kind, outcome=str(status))
+                if status == 429:
+                    DISCORD_RATE_LIMITED.inc(kind=op.kind)
+                if status not in RETRYABLE_STATUSES or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                backoff = min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1))
+                delay = max(retry_after_from(e), backoff) + random.uniform(0, self.base_backoff)
+                if status == 429:
+                    self.stats['rate_limited'] += 1
+                    self._blocked_until[op.route] = loop.time() + delay
+                logging.warning(
+                    f"Discord {op.kind} returned {status}; retry {attempt}/{self.max_retries} in {delay:.1f}s"
+                )
+                await asyncio.sleep(delay)
+
+    @staticmethod
+    async def _call(op):
+        if op.kind == 'create':
+            return await op.target.create_scheduled_event(**op.fields)
+        if op.kind == 'edit':
+            return await op.target.edit(**op.fields)
+        return await op.target.delete()
@@ -0,0 +1,116 @@
+import sqlite3
+import hashlib
+import logging
+
+import pendulum
+
+STORE_FILE = 'discord_event_map.db'
+
+
+def occurrence_start_key(start_time):
+    """Format an occurrence start as the UTC string used in the store."""
+    return start_time.in_tz('UTC').strftime('%Y%m%dT%H%M%SZ')
+
+
+def event_fingerprint(cal_event):
+    """Hash the fields that are pushed to Discord for a calendar event."""
+    fields = (
+        cal_event['name'],
+        cal_event['description'],
+        occurrence_start_key(cal_event['start_time']),
+        occurrence_start_key(cal_event['end_time']),
+        cal_event['location'],
+    )
+    return hashlib.sha256('\x1f'.join(fields).encode('utf-8')).hexdigest()
+
+
+class EventMappingStore:
+    """
+    SQLite store mapping calendar occurrences to Discord scheduled events.
+
+    Rows are keyed by guild, calendar uid and occurrence start, and hold the
+    Discord event ID plus the fingerprint of the fields last pushed to it, so
+    a restarted bot can reconcile by lookup instead of re-matching names.
+    """
+
+    def __init__(self, path=STORE_FILE):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS event_map (
+                guild_id INTEGER NOT NULL,
+                uid TEXT NOT NULL,
+                start_time TEXT NOT NULL,
+                event_id INTEGER NOT NULL,
+                fingerprint TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (guild_id, uid, start_time)
+            )
+            """
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS event_map_event_id ON event_map (guild_id, event_id)"
+        )
+        self.connection.commit()
+
+    def load(self, guild_id):
+        """Return {(uid, start_key): (event_id, fingerprint)} for a guild."""
+        rows = self.connection.execute(
+            "SELECT uid, start_time, event_id, fingerprint FROM event_map WHERE guild_id = ?",
+            (guild_id,)
+        )
+        return {(uid, start_time): (event_id, fingerprint) for uid, start_time, event_id, fingerprint in rows}
+
+    def record(self, guild_id, cal_event, event_id):
+        """Remember which Discord event an occurrence was pushed to, and with what fields."""
+        try:
+            with self.connection:
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO event_map VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        guild_id,
+                        cal_event['uid'],
+                        occurrence_start_key(cal_event['start_time']),
+                        event_id,
+                        event_fingerprint(cal_event),
+                        pendulum.now('UTC').isoformat(),
+                    )
+                )
+        except sqlite3.Error as e:
+            logging.error(f"Error recording event mapping for '{cal_event['name']}': {e}")
+
+    def forget(self, guild_id, event_id):
+        """Drop every mapping that points at a Discord event."""
+        try:
+            with self.connection:
+                self.connection.execute(
+                    "DELETE FROM event_map WHERE guild_id = ? AND event_id = ?",
+                    (guild_id, event_id)
+                )
+        except sqlite3.Error as e:
+            logging.error(f"Error removing event mapping for event {event_id}: {e}")
+
+    def invalidate(self, guild_id, event_id):
+        """Clear the pushed-fields fingerprint, so the next sync compares the event field by field."""
+        try:
+            with self.connection:
+                self.connection.execute(
+                    "UPDATE event_map SET fingerprint = '' WHERE guild_id = ? AND event_id = ?",
+                    (guild_id, event_id)
+                )
+        except sqlite3.Error as e:
+            logging.error(f"Error invalidating event mapping for event {event_id}: {e}")
+
+    def prune(self, guild_id, live_event_ids):
+        """Drop mappings whose Discord event no longer exists in the guild."""
+        stale = {
+            event_id for (event_id, _) in self.load(guild_id).values()
+            if event_id not in live_event_ids
+        }
+        for event_id in stale:
+            self.forget(guild_id, event_id)
+        return len(stale)
+
+    def close(self):
+        self.connection.close()
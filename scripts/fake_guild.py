@@ -0,0 +1,82 @@
+import asyncio
+import itertools
+from collections import Counter
+
+import discord
+
+
+class _FakeResponse:
+    """Just enough of an aiohttp response for discord.HTTPException."""
+
+    def __init__(self, status, reason):
+        self.status = status
+        self.reason = reason
+
+
+class FakeScheduledEvent:
+    """In-memory stand-in for discord.ScheduledEvent."""
+
+    def __init__(self, guild, event_id, name, description, start_time, end_time, location, image=None):
+        self.guild = guild
+        self.guild_id = guild.id
+        self.id = event_id
+        self.name = name
+        self.description = description
+        self.start_time = start_time
+        self.end_time = end_time
+        self.location = location
+        self.image = image
+        self.status = discord.EventStatus.scheduled
+
+    async def edit(self, **fields):
+        await self.guild.api_call('edit')
+        for field, value in fields.items():
+            if hasattr(self, field):
+                setattr(self, field, value)
+        return self
+
+    async def delete(self):
+        await self.guild.api_call('delete')
+        if self.guild.events.pop(self.id, None) is None:
+            raise discord.NotFound(_FakeResponse(404, 'Not Found'), 'Unknown Guild Scheduled Event')
+
+
+class FakeGuild:
+    """
+    In-process stand-in for a guild's scheduled-event API.
+
+    Implements the calls the bots make (scheduled_events,
+    fetch_scheduled_events, create_scheduled_event, and edit/delete on the
+    events), counts every API call in self.calls, and can add a simulated
+    round-trip latency per call.
+    """
+
+    _ids = itertools.count(1_000_000)
+
+    def __init__(self, guild_id=1, latency=0.0):
+        self.id = guild_id
+        self.latency = latency
+        self.events = {}
+        self.calls = Counter()
+
+    async def api_call(self, kind):
+        self.calls[kind] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    @property
+    def scheduled_events(self):
+        return list(self.events.values())
+
+    async def fetch_scheduled_events(self, **kwargs):
+        await self.api_call('fetch')
+        return list(self.events.values())
+
+    async def create_scheduled_event(self, name, start_time, end_time=None, description=None,
+                                     location=None, image=None, **kwargs):
+        await self.api_call('create')
+        event = FakeScheduledEvent(
+            self, next(self._ids), name, description, start_time, end_time, location, image
+        )
+        self.events[event.id] = event
+        return event
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from http_session import SESSION
+from metrics import timed
+from hal_parser import SYNOPTIC_SVG_ID, parse_hal_page
+
+LAB_URL = "https://www.maglaboratory.org/hal"
+
+
+class HalPage:
+    """
+    Snapshot of the HAL page, fetched and parsed once per tick.
+
+    The open status, the sensor table and the synoptic view SVG are all read
+    from the same parse of the document (see hal_parser), so the event text
+    and image always describe the same moment.
+    """
+
+    def __init__(self, html, url=LAB_URL, fetched_at=None, svg_id=SYNOPTIC_SVG_ID):
+        self.url = url
+        self.fetched_at = fetched_at or datetime.now()
+        self.parsed = parse_hal_page(html, svg_id)
+
+    @classmethod
+    def fetch(cls, url=LAB_URL, timeout=10):
+        """Download and parse the page; raises requests exceptions on failure."""
+        with timed('hal_fetch'):
+            response = SESSION.get(url, timeout=timeout)
+            response.raise_for_status()
+        with timed('hal_parse'):
+            return cls(response.content, url=url)
+
+    @property
+    def lab_status(self):
+        """Return 'We are OPEN' or 'We are CLOSED'."""
+        return self.parsed.lab_status
+
+    @property
+    def sensors(self):
+        """Return the sensor table rows as SensorReading tuples."""
+        return self.parsed.sensors
+
+    @property
+    def svg(self):
+        """Return the markup of the synoptic view SVG, or None if absent."""
+        return self.parsed.svg
@@ -0,0 +1,153 @@
+import re
+import logging
+from typing import List, NamedTuple, Optional
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # Fall back to BeautifulSoup's pure-Python parser
+    etree = lxml_html = None
+
+from bs4 import BeautifulSoup, UnicodeDammit
+
+SYNOPTIC_SVG_ID = 'maglab-synoptic-view'
+
+STATUS_WORD = re.compile(r'\b(open|closed)\b', re.IGNORECASE)
+
+# Rows of the sensor table that describe the page itself, not the lab
+IGNORED_SENSORS = ("Page Loaded", "Auto Refresh")
+
+_fallback_warned = False  # The html.parser fallback is reported once per process
+
+
+class SensorReading(NamedTuple):
+    name: str
+    status: str
+    detail: str
+    last_update: str
+
+
+class HalParseResult(NamedTuple):
+    lab_status: str
+    sensors: List[SensorReading]
+    svg: Optional[str]
+
+
+def status_from_text(text):
+    """Map a status text to 'We are OPEN' / 'We are CLOSED', or None if it names neither."""
+    words = {match.lower() for match in STATUS_WORD.findall(text)}
+    if 'closed' in words:
+        return "We are CLOSED"
+    if 'open' in words:
+        return "We are OPEN"
+    return None
+
+
+def resolve_lab_status(status_texts, sensors, page_text):
+    """
+    Pick the lab status from the most specific source available.
+
+    In order: an element whose id or class mentions 'status', the sensor row
+    for the open switch, and finally the whole-page heuristic the bot
+    originally used. page_text is a callable, so the full page text is only
+    extracted when nothing more specific was found.
+    """
+    for text in status_texts:
+        status = status_from_text(text)
+        if status:
+            return status
+    for sensor in sensors:
+        if 'switch' in sensor.name.lower() or 'open' in sensor.name.lower():
+            status = status_from_text(sensor.status)
+            if status:
+                return status
+    page_text = page_text().lower()
+    return (
+        "We are OPEN"
+        if 'open' in page_text and 'closed' not in page_text
+        else "We are CLOSED"
+    )
+
+
+def parse_hal_page(html, svg_id=SYNOPTIC_SVG_ID):
+    """
+    Extract the lab status, sensor table rows and synoptic SVG from the HAL page.
+
+    Uses lxml with targeted XPath queries when it is installed, so only the
+    status element, the first table's rows and the SVG subtree are turned
+    into Python objects; otherwise falls back to BeautifulSoup with the much
+    slower html.parser, and logs a warning the first time it does.
+    """
+    global _fallback_warned
+    if lxml_html is not None:
+        return _parse_with_lxml(html, svg_id)
+    if not _fallback_warned:
+        logging.warning("lxml is not installed; parsing the HAL page with the slower html.parser fallback")
+        _fallback_warned = True
+    return _parse_with_soup(html, svg_id)
+
+
+def _decode(html):
+    """Decode page bytes; HAL serves UTF-8, anything else goes through encoding detection."""
+    if isinstance(html, str):
+        return html
+    try:
+        return html.decode('utf-8')
+    except UnicodeDecodeError:
+        return UnicodeDammit(html, is_html=True).unicode_markup
+
+
+def _parse_with_lxml(html, svg_id):
+    document = lxml_html.fromstring(_decode(html))
+
+    sensors = []
+    tables = document.xpath('(//table)[1]')
+    if tables:
+        for row in tables[0].iter('tr'):
+            cells = row.findall('td')
+            if len(cells) == 4:
+                sensors.append(SensorReading(*
+                    [''.join(text.strip() for text in cell.itertext()) for cell in cells]
+                ))
+
+    svg_elements = document.xpath('//svg[@id=$svg_id]', svg_id=svg_id)
+    svg = (
+        etree.tostring(svg_elements[0], encoding='unicode', method='xml', with_tail=False)
+        if svg_elements else None
+    )
+
+    status_texts = [
+        element.text_content()
+        for element in document.xpath(
+            '//*[(contains(@id, "status") or contains(@class, "status"))'
+            ' and not(ancestor::table) and not(ancestor::svg)'
+            ' and not(.//table) and not(.//svg)]'
+        )
+    ]
+    lab_status = resolve_lab_status(status_texts, sensors, document.text_content)
+    return HalParseResult(lab_status, [s for s in sensors if s.name not in IGNORED_SENSORS], svg)
+
+
+def _parse_with_soup(html, svg_id):
+    soup = BeautifulSoup(html, 'html.parser')
+
+    sensors = []
+    sensor_table = soup.find('table')
+    if sensor_table:
+        for row in sensor_table.find_all('tr'):
+            cells = row.find_all('td')
+            if len(cells) == 4:
+                sensors.append(SensorReading(*[cell.get_text(strip=True) for cell in cells]))
+
+    svg_element = soup.find('svg', {'id': svg_id})
+    svg = str(svg_element) if svg_element else None
+
+    status_texts = [
+        element.get_text(' ')
+        for element in soup.find_all(
+            lambda tag: any('status' in value for value in [tag.get('id') or ''] + list(tag.get('class') or []))
+        )
+        if not element.find_parent(['table', 'svg']) and not element.find(['table', 'svg'])
+    ]
+    lab_status = resolve_lab_status(status_texts, sensors, soup.get_text)
+    return HalParseResult(lab_status, [s for s in sensors if s.name not in IGNORED_SENSORS], svg)
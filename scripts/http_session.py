@@ -0,0 +1,47 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = (5, 20)  # (connect, read) seconds, for calls that do not pass their own
+POOL_CONNECTIONS = 4  # Hosts kept pooled (HAL and the Google calendar hosts)
+POOL_MAXSIZE = 8  # Keep-alive connections per host; covers the ICS worker threads
+RETRIES = Retry(
+    total=3,
+    connect=3,
+    read=2,
+    status=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({'GET', 'HEAD'}),
+    respect_retry_after_header=True,
+    raise_on_status=False,  # Hand the last response back so callers' raise_for_status() reports it
+)
+
+
+class PooledSession(requests.Session):
+    """
+    requests.Session with pooled keep-alive connections, retries for
+    connection errors and 429/5xx responses, gzip negotiation, and a default
+    timeout, so no request can hang forever.
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=RETRIES,
+                 pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+        super().__init__()
+        self.timeout = timeout
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retries
+        )
+        self.mount('https://', adapter)
+        self.mount('http://', adapter)
+        self.headers['Accept-Encoding'] = 'gzip, deflate'
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().request(method, url, **kwargs)
+
+
+# One HTTP session for the whole process, so the HAL scrape, the SVG scrape and
+# the ICS downloads reuse warm TCP+TLS connections instead of a handshake per request
+SESSION = PooledSession()
@@ -0,0 +1,118 @@
+import os
+import json
+import hashlib
+import logging
+import datetime
+
+import pendulum
+
+CACHE_DIR = 'ics_cache'
+
+
+def content_hash(content):
+    """Return a stable hash of a feed body."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def _encode(value):
+    """JSON hook for the datetimes stored in expanded occurrences."""
+    if isinstance(value, datetime.datetime):
+        return {'__datetime__': value.isoformat()}
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _decode(obj):
+    """JSON hook restoring datetimes as UTC pendulum instances."""
+    if '__datetime__' in obj:
+        return pendulum.parse(obj['__datetime__']).in_tz('UTC')
+    return obj
+
+
+class FeedCache:
+    """
+    Persist ICS feed bodies, their HTTP validators and their expanded
+    occurrences on disk, keyed by URL.
+
+    Each URL gets two files in the cache directory: the raw body (.ics) and
+    a JSON metadata file holding the ETag, Last-Modified, content hash and
+    the occurrence lists expanded from that body. The metadata last loaded or
+    saved for a URL is also kept in memory, so feeds that are not due for a
+    refresh are served without reading the JSON back.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._loaded = {}  # URL -> metadata as last loaded or saved
+
+    def _path(self, url, suffix):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+        return os.path.join(self.cache_dir, key + suffix)
+
+    def load(self, url):
+        """Return the cached metadata for a URL, or None if nothing usable is stored."""
+        if url in self._loaded:
+            return self._loaded[url]
+        meta_path = self._path(url, '.json')
+        if not os.path.exists(meta_path) or not os.path.exists(self._path(url, '.ics')):
+            return None
+        try:
+            with open(meta_path, 'r') as meta_file:
+                meta = json.load(meta_file, object_hook=_decode)
+        except (OSError, ValueError) as e:
+            logging.error(f"Error reading feed cache for {url}: {e}")
+            return None
+        if meta.get('url') != url:
+            return None
+        self._loaded[url] = meta
+        return meta
+
+    def read_body(self, url):
+        """Return the cached feed body for a URL, or None if missing."""
+        try:
+            with open(self._path(url, '.ics'), 'rb') as body_file:
+                return body_file.read()
+        except OSError:
+            return None
+
+    def save(self, url, meta, content=None):
+        """Write the metadata (and the body, when given) for a URL atomically."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            if content is not None:
+                self._write(self._path(url, '.ics'), content)
+            meta = dict(meta, url=url)
+            self._write(self._path(url, '.json'), json.dumps(meta, default=_encode).encode('utf-8'))
+            self._loaded[url] = meta
+        except OSError as e:
+            logging.error(f"Error writing feed cache for {url}: {e}")
+
+    @staticmethod
+    def _write(path, data):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as tmp_file:
+            tmp_file.write(data)
+        os.replace(tmp_path, path)
+
+
+def conditional_headers(meta):
+    """Build If-None-Match / If-Modified-Since headers from cached metadata."""
+    headers = {}
+    if not meta:
+        return headers
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    return headers
+
+
+def covers_window(meta, now, future):
+    """Check whether the cached expansion spans the requested sync window."""
+    if not meta or 'expanded_from' not in meta or 'expanded_until' not in meta:
+        return False
+    return meta['expanded_from'] <= now and future <= meta['expanded_until']
+
+
+def select_window(entries, now, future):
+    """Return the events whose window time falls between now and future."""
+    return [event for window_time, event in entries if now <= window_time <= future]
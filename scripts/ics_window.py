@@ -0,0 +1,142 @@
+import io
+import datetime
+
+# Local (TZID or floating) times are compared as if they were UTC; this
+# margin covers every UTC offset, the exact check happens after parsing
+SLACK = datetime.timedelta(days=1)
+
+# VEVENT properties the window check reads; everything else is copied unread
+_CHECKED = (b'DTSTART', b'DTEND', b'RRULE', b'RECURRENCE-ID', b'STATUS')
+
+
+def _content_lines(content):
+    """Yield each content line of an ICS body as its list of physical lines (folds included)."""
+    lines = []
+    for physical in io.BytesIO(content):
+        if lines and physical[:1] in (b' ', b'\t'):
+            lines.append(physical)
+            continue
+        if lines:
+            yield lines
+        lines = [physical]
+    if lines:
+        yield lines
+
+
+def _unfold(lines):
+    return lines[0].rstrip(b'\r\n') + b''.join(line[1:].rstrip(b'\r\n') for line in lines[1:])
+
+
+def _split_property(line):
+    """(upper-case name, value) of an unfolded content line; the value follows the first unquoted colon."""
+    quoted = False
+    name_end = None
+    for i, char in enumerate(line):
+        if char == 0x22:  # '"'
+            quoted = not quoted
+        elif not quoted:
+            if name_end is None and char == 0x3B:  # ';'
+                name_end = i
+            elif char == 0x3A:  # ':'
+                return line[:name_end if name_end is not None else i].upper(), line[i + 1:].strip()
+    return line.upper(), b''
+
+
+def _parse_time(value):
+    """Naive datetime of an ICS DATE or DATE-TIME value, ignoring its zone; None if unreadable."""
+    try:
+        if len(value) >= 15 and value[8:9] in (b'T', b't'):
+            return datetime.datetime(
+                int(value[0:4]), int(value[4:6]), int(value[6:8]),
+                int(value[9:11]), int(value[11:13]), int(value[13:15])
+            )
+        return datetime.datetime(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+    except ValueError:
+        return None
+
+
+def _naive_utc(moment):
+    return datetime.datetime(*moment.astimezone(datetime.timezone.utc).timetuple()[:6])
+
+
+def can_intersect(properties, after, before):
+    """
+    Whether a VEVENT, given its checked properties, can matter for a sync
+    window of naive UTC times after..before (already widened by SLACK).
+
+    Mirrors what expand_calendar uses: series are kept unless their DTSTART
+    is past the window or their UNTIL before it, overrides and cancellations
+    of occurrences when their RECURRENCE-ID or end is in the window, one-off
+    events when their end is. Cancellations of a whole UID are always kept,
+    and so is anything that cannot be read cheaply.
+    """
+    recurrence_id = properties.get(b'RECURRENCE-ID')
+    if properties.get(b'STATUS', b'').upper() == b'CANCELLED' and recurrence_id is None:
+        return True
+
+    rrule = properties.get(b'RRULE')
+    if rrule is not None:
+        start = _parse_time(properties.get(b'DTSTART', b''))
+        if start is not None and start > before:
+            return False
+        until_at = rrule.upper().find(b'UNTIL=')
+        if until_at >= 0:
+            until = _parse_time(rrule[until_at + 6:].split(b';', 1)[0])
+            if until is not None and until < after:
+                return False
+        return True
+
+    if recurrence_id is not None:
+        occurrence = _parse_time(recurrence_id)
+        if occurrence is None or after <= occurrence <= before:
+            return True
+
+    end = _parse_time(properties.get(b'DTEND', b''))
+    return end is None or after <= end <= before
+
+
+def window_ics(content, after, before):
+    """
+    Return an ICS body reduced to the VEVENTs that can intersect after..before.
+
+    The body is read one content line at a time: each VEVENT is buffered
+    only until its END line, checked on DTSTART, DTEND, RRULE,
+    RECURRENCE-ID and STATUS with can_intersect, and then copied or dropped.
+    Everything outside VEVENTs (the calendar properties, VTIMEZONEs) is
+    copied as is, so the result parses exactly like the original for the
+    kept events, while Calendar.from_ical only builds those.
+    """
+    window_after = _naive_utc(after) - SLACK
+    window_before = _naive_utc(before) + SLACK
+    kept = []
+    event = None  # Physical lines of the VEVENT being read
+    properties = None
+    depth = 0  # Component nesting inside the VEVENT
+
+    for lines in _content_lines(content):
+        first = lines[0]
+        head = first[:16].upper()
+        if event is None:
+            if head.startswith(b'BEGIN:VEVENT'):
+                event, properties, depth = list(lines), {}, 0
+            else:
+                kept.extend(lines)
+            continue
+
+        event.extend(lines)
+        if head.startswith(b'BEGIN:'):
+            depth += 1
+        elif head.startswith(b'END:'):
+            if depth:
+                depth -= 1
+                continue
+            if can_intersect(properties, window_after, window_before):
+                kept.extend(event)
+            event = properties = None
+        elif depth == 0 and head.startswith(_CHECKED):
+            name, value = _split_property(_unfold(lines))
+            properties.setdefault(name, value)
+
+    if event is not None:
+        kept.extend(event)  # Unterminated VEVENT; leave it to the full parser to reject
+    return b''.join(kept)
@@ -0,0 +1,139 @@
+import os
+import sys
+import time
+import heapq
+import pstats
+import cProfile
+import logging
+import functools
+import threading
+import tracemalloc
+from contextlib import asynccontextmanager
+
+PROFILE_DIR = 'profiles'
+
+# Time the loop spends waiting, not working; left out of the summary's hot spot
+IDLE_FUNCTIONS = ('select.epoll', 'select.kqueue', 'select.select', '_thread.lock', "'_overlapped")
+
+PROFILERS = []
+
+# From Python 3.12 cProfile is built on sys.monitoring: only one profiler can
+# be active per interpreter, and it sees the calls of every thread
+PER_THREAD_PROFILES = sys.version_info < (3, 12)
+
+
+class LoopProfiler:
+    """
+    Opt-in cProfile and tracemalloc capture of a loop's iterations.
+
+    Off by default (slowest=0), in which case an iteration only pays for
+    entering the context manager (a few microseconds). When on, every
+    iteration is profiled on the event loop thread, plus any worker-thread
+    calls made through wrap() (on Python 3.12+ the iteration's own profile
+    covers them, see PER_THREAD_PROFILES), and traced with tracemalloc. A
+    summary line is logged per iteration, and the .prof and .tracemalloc
+    files of the slowest N iterations are kept in directory, deleting faster
+    ones as slower iterations come in.
+
+    cProfile and tracemalloc are process-wide, so when both loops run in one
+    process only one iteration is profiled at a time; an iteration that
+    overlaps another profiled one runs unprofiled.
+    """
+
+    _busy = threading.Lock()
+
+    def __init__(self, name, slowest=0, directory=PROFILE_DIR):
+        self.name = name
+        self.slowest = slowest
+        self.directory = directory
+        self._kept = []  # Min-heap of (seconds, paths) for the slowest iterations
+        self._iterations = 0
+        self._thread_profiles = None
+        PROFILERS.append(self)
+
+    def wrap(self, func):
+        """Return func profiled in its worker thread whenever an iteration is being profiled."""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            thread_profiles = self._thread_profiles
+            if thread_profiles is None or not PER_THREAD_PROFILES:
+                return func(*args, **kwargs)
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(func, *args, **kwargs)
+            finally:
+                thread_profiles.append(profile)
+        return wrapper
+
+    @asynccontextmanager
+    async def iteration(self):
+        """Profile the body of the async with-block as one iteration."""
+        if not self.slowest or not self._busy.acquire(blocking=False):
+            yield
+            return
+
+        self._iterations += 1
+        self._thread_profiles = []
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start(10)
+        tracemalloc.reset_peak()
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            elapsed = time.perf_counter() - started
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if not was_tracing:
+                tracemalloc.stop()
+            thread_profiles, self._thread_profiles = self._thread_profiles, None
+            self._busy.release()
+            try:
+                self._record(elapsed, peak, pstats.Stats(profile, *thread_profiles), snapshot)
+            except Exception as e:
+                logging.error(f"Error saving {self.name} profile: {e}")
+
+    def _record(self, elapsed, peak, stats, snapshot):
+        kept = len(self._kept) < self.slowest or elapsed > self._kept[0][0]
+        if kept:
+            os.makedirs(self.directory, exist_ok=True)
+            base = os.path.join(
+                self.directory,
+                f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}-{self._iterations}-{elapsed * 1000:.0f}ms"
+            )
+            paths = (base + '.prof', base + '.tracemalloc')
+            stats.dump_stats(paths[0])
+            snapshot.dump(paths[1])
+            if len(self._kept) >= self.slowest:
+                _, evicted = heapq.heappop(self._kept)
+                for path in evicted:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            heapq.heappush(self._kept, (elapsed, paths))
+
+        busy = [
+            item for item in stats.stats.items()
+            if not any(idle in item[0][2] for idle in IDLE_FUNCTIONS)
+        ]
+        (filename, line, function), (_, _, self_time, _, _) = max(
+            busy or stats.stats.items(), key=lambda item: item[1][2]
+        )
+        logging.info(
+            f"Profiled {self.name} iteration {self._iterations}: {elapsed:.2f}s, "
+            f"peak traced memory {peak / 2**20:.1f} MiB, most self time in "
+            f"{function} ({os.path.basename(filename)}:{line}) {self_time:.2f}s"
+            f"{f', saved {base}.prof' if kept else ''}"
+        )
+
+
+def configure_profilers(slowest, directory=PROFILE_DIR):
+    """Turn profiling on (slowest > 0) or off for every loop."""
+    for profiler in PROFILERS:
+        profiler.slowest = slowest
+        profiler.directory = directory
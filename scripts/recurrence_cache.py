@@ -0,0 +1,81 @@
+import time
+import bisect
+import threading
+
+from dateutil.rrule import rrule
+
+
+class _Expansion:
+    """Occurrences of one series already computed for (expanded_from, expanded_until)."""
+
+    __slots__ = ('rule', 'occurrences', 'expanded_from', 'expanded_until', 'reanchor', 'used_at')
+
+    def __init__(self, rule, occurrences, expanded_from, expanded_until, reanchor):
+        self.rule = rule
+        self.occurrences = occurrences
+        self.expanded_from = expanded_from
+        self.expanded_until = expanded_until
+        self.reanchor = reanchor
+        self.used_at = time.monotonic()
+
+
+class RecurrenceCache:
+    """
+    Sliding-window cache of recurring-series expansions.
+
+    Entries are keyed by the series identity (uid, RRULE, DTSTART, timezone,
+    SEQUENCE, LAST-MODIFIED), so any edit to a series starts a fresh
+    expansion. As the window moves forward, occurrences that fell out of it
+    are dropped and only the newly exposed end is computed. Rules without
+    COUNT are re-anchored on their latest cached occurrence before being
+    extended, so a long-running series with an old DTSTART is not iterated
+    from DTSTART (or from the start of the window) again. Entries unused for
+    max_idle seconds are evicted.
+    """
+
+    def __init__(self, max_idle=2 * 24 * 60 * 60):
+        self.max_idle = max_idle
+        self._entries = {}
+        self._lock = threading.Lock()  # Feeds are expanded in worker threads
+
+    def between(self, key, build_rule, after, before):
+        """
+        Return the occurrences strictly between after and before, like rule.between(after, before).
+
+        build_rule() is only called on a cache miss and returns the parsed
+        rule together with whether it may be re-anchored (False for COUNT).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or after < entry.expanded_from:
+                rule, reanchor = build_rule()
+                entry = _Expansion(rule, rule.between(after, before), after, before, reanchor)
+                self._entries[key] = entry
+            elif before > entry.expanded_until:
+                if entry.reanchor and entry.occurrences and isinstance(entry.rule, rrule):
+                    entry.rule = entry.rule.replace(dtstart=entry.occurrences[-1])
+                # Only the newly exposed end of the window; an occurrence exactly
+                # at the old boundary was excluded before, so it is included now
+                entry.occurrences.extend(
+                    occurrence
+                    for occurrence in entry.rule.between(entry.expanded_until, before, inc=True)
+                    if occurrence < before
+                )
+                entry.expanded_until = before
+
+            if after > entry.expanded_from:
+                del entry.occurrences[:bisect.bisect_right(entry.occurrences, after)]
+                entry.expanded_from = after
+
+            entry.used_at = time.monotonic()
+            return entry.occurrences[:bisect.bisect_left(entry.occurrences, before)]
+
+    def evict_idle(self):
+        """Drop series that have not been expanded for max_idle seconds."""
+        cutoff = time.monotonic() - self.max_idle
+        with self._lock:
+            for key in [key for key, entry in self._entries.items() if entry.used_at < cutoff]:
+                del self._entries[key]
+
+    def __len__(self):
+        return len(self._entries)
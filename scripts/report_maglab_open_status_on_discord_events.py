@@ -1,26 +1,52 @@
 import os
+import time
+import asyncio
+import hashlib
+import functools
 import logging
 from logging.handlers import RotatingFileHandler
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import discord
-from discord.ext import tasks, commands
+from discord.ext import tasks
 import requests
-from bs4 import BeautifulSoup
 import pytz
-import pandas as pd
 
+from hal_page import HalPage, LAB_URL
+from hal_parser import SYNOPTIC_SVG_ID
+from loop_profiler import LoopProfiler
+from metrics import PHASE_FAILURES, STATUS_CHANGE_LAG_SECONDS, timed
+from sensor_history import SensorHistory
+from shared_bot import (
+    GUILD_ID, SENSOR_HISTORY_FILE, STATUS_LOOP, WRITE_QUEUE, bot, load_bot_config, loop_enabled, run_bot
+)
 from scrape_synoptic_view_and_crop_scale_for_discord_events import generate_scaled_cropped_synoptic_view_image
+from text_table import DISCORD_EVENT_DESCRIPTION_LIMIT, format_table_within
 
 # Constants
-TOKEN_FILE = 'discord_token.txt'
-GUILD_ID = 697971426799517774
-LAB_URL = "https://www.maglaboratory.org/hal"
-SCALED_PNG_FILE = 'maglab_synoptic_view_scaled.png'
+SCALED_PNG_FILE = 'maglab_synoptic_view_scaled.png'  # Fallback image until the first render succeeds
+
+# Unchanged descriptions are still resent this often, so the scrape time and
+# sensor ages shown on Discord are never more than this old
+DESCRIPTION_REFRESH_SECONDS = 30 * 60
+
+# Single worker so renders never compete for the CPU of the small host
+RENDER_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix='synoptic-render')
+
+# Opt-in per-tick profiling (profile_slowest in bot_config.json)
+PROFILER = LoopProfiler('status')
+
+PACIFIC = pytz.timezone('America/Los_Angeles')
+
+# Bounded history of every scrape, for the trends line in the description
+SENSOR_HISTORY = SensorHistory()
+SENSOR_HISTORY_LOCK = asyncio.Lock()  # Held while on_ready replays the history file
 
 # Configure logging
 logger = logging.getLogger('discord_bot')
 logger.setLevel(logging.INFO)
+logger.propagate = False  # Has its own handlers; keep it out of the calendar sync's root log
 
 # Create formatter
 formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
@@ -41,25 +67,20 @@ file_handler.setFormatter(formatter)
 logger.addHandler(console_handler)
 logger.addHandler(file_handler)
 
-# Initialize the Discord bot
-intents = discord.Intents.default()
-bot = commands.Bot(command_prefix='!', intents=intents)
+# Last successfully rendered synoptic view PNG
+last_image_binary = None
 
+# Status event ID -> hash of the image last uploaded to it
+pushed_image_hashes = {}
 
-def get_discord_token():
-    """Retrieve the Discord bot token from a file."""
-    try:
-        with open(TOKEN_FILE, 'r') as token_file:
-            return token_file.read().strip()
-    except FileNotFoundError:
-        logger.error(f"'{TOKEN_FILE}' not found.")
-        return None
+# Status event ID -> (fingerprint (see description_fingerprint), monotonic time)
+# of the description last sent to it
+pushed_description_fingerprints = {}
 
-
-TOKEN = get_discord_token()
-if not TOKEN:
-    logger.critical("Discord token is missing. Exiting the bot.")
-    raise SystemExit("Discord token is missing.")
+# Last lab status read from HAL, and when HAL last changed it if the
+# Discord event does not show that change yet (for the lag metric)
+last_lab_status = None
+pending_status_change_at = None
 
 
 def current_time_str():
@@ -67,46 +88,35 @@ def current_time_str():
     return datetime.now().strftime("[%Y-%m-%d %I:%M %p]")
 
 
-def fetch_lab_status_and_sensors(url):
-    """Scrape lab status and sensor data from the webpage."""
+def fetch_hal_page(url):
+    """Fetch and parse the HAL page once for this tick."""
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        return HalPage.fetch(url, timeout=10)
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching the webpage: {e}")
-        return None, None, None
+        PHASE_FAILURES.inc(phase='hal_fetch')
+        return None
 
-    soup = BeautifulSoup(response.text, 'html.parser')
-    page_text = soup.get_text().lower()
+
+def fetch_lab_status_and_sensors(page):
+    """Read lab status and sensor data from a HAL page snapshot."""
+    if page is None:
+        return None, None, None
 
     # Determine lab status
-    lab_status = (
-        "We are OPEN"
-        if 'open' in page_text and 'closed' not in page_text
-        else "We are CLOSED"
-    )
+    lab_status = page.lab_status
 
     # Parse sensor data
-    sensor_data = []
-    sensor_table = soup.find('table')
-    if sensor_table:
-        for row in sensor_table.find_all('tr'):
-            cells = row.find_all('td')
-            if len(cells) == 4:
-                sensor_name = cells[0].get_text(strip=True)
-                status = truncate_status(cells[1].get_text(strip=True))
-                if sensor_name not in ["Page Loaded", "Auto Refresh"]:
-                    sensor_data.append(
-                        {
-                            'Sensor': sensor_name,
-                            'Status': status,
-                            'Last Update': format_last_update(
-                                cells[3].get_text(strip=True)
-                            ),
-                        }
-                    )
-
-    scrape_timestamp = datetime.now().strftime("%Y-%m-%d %I:%M %p %Z")
+    sensor_data = [
+        {
+            'Sensor': reading.name,
+            'Status': truncate_status(reading.status),
+            'Last Update': format_last_update(reading.last_update),
+        }
+        for reading in page.sensors
+    ]
+
+    scrape_timestamp = page.fetched_at.strftime("%Y-%m-%d %I:%M %p %Z")
     return lab_status, sensor_data, scrape_timestamp
 
 
@@ -119,15 +129,19 @@ def truncate_status(status):
     return status.replace("No Movement", "No Motion")
 
 
-def format_last_update(timestamp_str):
-    """Format the time since the last update."""
+def parse_hal_timestamp(timestamp_str):
+    """Parse a HAL 'Last Update' cell (e.g. 'Oct 17, 2026, 01:05 AM PDT') as Pacific time."""
     timestamp_str = timestamp_str.rsplit(' ', 1)[0]
     timestamp_format = "%b %d, %Y, %I:%M %p"
+    timestamp = datetime.strptime(timestamp_str, timestamp_format)
+    return pytz.timezone('America/Los_Angeles').localize(timestamp)
+
+
+def format_last_update(timestamp_str):
+    """Format the time since the last update."""
     try:
-        timestamp = datetime.strptime(timestamp_str, timestamp_format)
-        pacific = pytz.timezone('America/Los_Angeles')
-        localized_timestamp = pacific.localize(timestamp)
-        time_diff = datetime.now(pacific) - localized_timestamp
+        localized_timestamp = parse_hal_timestamp(timestamp_str)
+        time_diff = datetime.now(localized_timestamp.tzinfo) - localized_timestamp
 
         if time_diff < timedelta(minutes=1):
             return "Just now"
@@ -141,16 +155,49 @@ def format_last_update(timestamp_str):
         return "Unknown"
 
 
-def format_sensor_data(lab_status, sensor_data, scrape_timestamp, url):
-    """Format the scraped sensor data for the Discord event description."""
-    df = pd.DataFrame(sensor_data)
-    table_string = df.to_string(index=False)
-    return (
-        f"**Lab Status:** {lab_status}\n"
+def format_trends(history, now=None):
+    """Today's (Pacific) trends from the sensor history: time open, then each numeric sensor's range."""
+    now = now or datetime.now(PACIFIC)
+    midnight = PACIFIC.localize(datetime(now.year, now.month, now.day))
+    since, until = midnight.timestamp(), now.timestamp()
+
+    open_minutes = int(history.open_duration("We are OPEN", since, until) // 60)
+    trends = [f"open {open_minutes // 60}h {open_minutes % 60:02d}m"]
+    for name, series in history.series.items():
+        summary = series.summary(since)
+        if summary:
+            low, high, _ = summary
+            unit = f" {series.unit}" if series.unit else ''
+            trends.append(f"{name} {low:g}–{high:g}{unit}")
+    return trends
+
+
+def format_sensor_data(lab_status, sensor_data, scrape_timestamp, url, trends=()):
+    """
+    Format the scraped sensor data for the Discord event description.
+
+    The sensor table is trimmed to whole rows so the description stays within
+    Discord's limit and the code block is always closed. Trends (see
+    format_trends) only take the room the table leaves, first items first.
+    """
+    status_line = f"**Lab Status:** {lab_status}\n"
+    header = (
         f"**Data Scraped on:** {scrape_timestamp}\n"
         f"[Source: {url}]\n\n"
-        f"**Sensor Data:**\n```\n{table_string}\n```"
+        f"**Sensor Data:**\n```\n"
     )
+    footer = "\n```"
+    budget = DISCORD_EVENT_DESCRIPTION_LIMIT - len(status_line) - len(header) - len(footer)
+    table = format_table_within(sensor_data, budget)
+
+    spare = budget - len(table)
+    trends_line = ''
+    for shown in range(len(trends), 0, -1):
+        trends_line = f"**Today:** {', '.join(trends[:shown])}\n"
+        if len(trends_line) <= spare:
+            break
+        trends_line = ''
+    return status_line + trends_line + header + table + footer
 
 
 def get_image_as_binary(image_path):
@@ -163,8 +210,62 @@ def get_image_as_binary(image_path):
         return None
 
 
-async def manage_lab_status_event(guild, lab_status, formatted_message, image_binary):
-    """Manage the 'We are' event: update, create, or delete as necessary."""
+def image_fingerprint(image_binary):
+    """Hash image bytes so unchanged pictures are not uploaded again."""
+    return hashlib.sha256(image_binary).hexdigest()
+
+
+def description_fingerprint(lab_status, sensor_data):
+    """
+    Hash what the status event description reports: the lab status and each sensor's value.
+
+    The scrape time, the sensors' "N min ago" ages and the trends line (the
+    time open keeps counting) change on every tick and are left out, so the
+    description is only sent again when the status or a sensor value changes,
+    or every DESCRIPTION_REFRESH_SECONDS to bring those fields up to date.
+    """
+    readings = ''.join(f"{row['Sensor']}\t{row['Status']}\n" for row in sensor_data)
+    return hashlib.sha256(f"{lab_status}\n{readings}".encode('utf-8')).hexdigest()
+
+
+def record_pushed_event(event_id, image_binary, description_key=None):
+    """Remember the image last uploaded to the status event, and the description when one was sent."""
+    if event_id not in pushed_image_hashes:
+        pushed_image_hashes.clear()
+        pushed_description_fingerprints.clear()
+    pushed_image_hashes[event_id] = image_fingerprint(image_binary)
+    if description_key is not None:
+        pushed_description_fingerprints[event_id] = (description_key, time.monotonic())
+
+
+def status_event_changes(existing_event, lab_status, formatted_message, description_key, image_binary):
+    """
+    Return the fields of the status event that actually changed.
+
+    The name is compared with the cached event. The description is compared
+    by description_key with the last one sent to this event, so a tick that
+    only moves the scrape time and ages leaves it alone until it is
+    DESCRIPTION_REFRESH_SECONDS old; the image is compared by hash with the
+    last upload, since Discord only exposes the stored cover image as an
+    asset.
+    """
+    changes = {}
+    if existing_event.name != lab_status:
+        changes['name'] = lab_status
+    pushed_key, pushed_at = pushed_description_fingerprints.get(existing_event.id, (None, None))
+    if pushed_key != description_key or time.monotonic() - pushed_at >= DESCRIPTION_REFRESH_SECONDS:
+        changes['description'] = formatted_message
+    if pushed_image_hashes.get(existing_event.id) != image_fingerprint(image_binary):
+        changes['image'] = image_binary
+    return changes
+
+
+async def manage_lab_status_event(guild, lab_status, formatted_message, description_key, image_binary):
+    """
+    Manage the 'We are' event: update, create, or delete as necessary.
+
+    Returns True when the event now shows lab_status, False otherwise.
+    """
     try:
         now = datetime.now().astimezone()
         event_end_time = now + timedelta(minutes=10)
@@ -177,7 +278,7 @@ async def manage_lab_status_event(guild, lab_status, formatted_message, image_bi
         # Delete extra 'We are' events if more than one exists
         if len(existing_events) > 1:
             for event in existing_events[1:]:
-                await event.delete()
+                await WRITE_QUEUE.delete(event)
                 logger.info(
                     f"Deleted extra 'We are' event: {event.name}, Start Time: {event.start_time.astimezone().strftime('%Y-%m-%d %I:%M %p')}"
                 )
@@ -192,29 +293,33 @@ async def manage_lab_status_event(guild, lab_status, formatted_message, image_bi
         if other_active_event:
             # Delete 'We are' event if it exists
             if existing_event:
-                await existing_event.delete()
+                await WRITE_QUEUE.delete(existing_event)
                 logger.info(
                     f"Deleted 'We are' event due to another active event: {existing_event.name}, Start Time: {existing_event.start_time.astimezone().strftime('%Y-%m-%d %I:%M %p')}"
                 )
             logger.info("Another event is active. Not creating 'We are' event.")
-            return
+            return False
 
         # Update or create 'We are' event
         if existing_event and existing_event.end_time > now:
             try:
-                await existing_event.edit(
-                    name=lab_status,
-                    description=formatted_message,
-                    end_time=event_end_time,
-                    image=image_binary,
+                changes = status_event_changes(
+                    existing_event, lab_status, formatted_message, description_key, image_binary
+                )
+                await WRITE_QUEUE.edit(
+                    existing_event, end_time=event_end_time, **changes
+                )
+                record_pushed_event(
+                    existing_event.id, image_binary, description_key if 'description' in changes else None
                 )
                 logger.info(
                     f"Updated event: {existing_event.name}, Start Time: {existing_event.start_time.astimezone().strftime('%Y-%m-%d %I:%M %p')}"
+                    f" (end_time{''.join(', ' + field for field in sorted(changes))})"
                 )
             except discord.errors.Forbidden as e:
                 logger.error(f"Cannot update event: {e}")
                 # Since the event cannot be updated, delete it and create a new one
-                await existing_event.delete()
+                await WRITE_QUEUE.delete(existing_event)
                 logger.info(
                     f"Deleted non-updatable 'We are' event: {existing_event.name}, Start Time: {existing_event.start_time.astimezone().strftime('%Y-%m-%d %I:%M %p')}"
                 )
@@ -222,14 +327,15 @@ async def manage_lab_status_event(guild, lab_status, formatted_message, image_bi
         else:
             # Delete the finished event if it exists
             if existing_event:
-                await existing_event.delete()
+                await WRITE_QUEUE.delete(existing_event)
                 logger.info(
                     f"Deleted finished 'We are' event: {existing_event.name}, Start Time: {existing_event.start_time.astimezone().strftime('%Y-%m-%d %I:%M %p')}"
                 )
             existing_event = None
 
         if not existing_event:
-            new_event = await guild.create_scheduled_event(
+            new_event = await WRITE_QUEUE.create(
+                guild,
                 name=lab_status,
                 description=formatted_message,
                 start_time=now + timedelta(seconds=10),
@@ -239,12 +345,15 @@ async def manage_lab_status_event(guild, lab_status, formatted_message, image_bi
                 privacy_level=discord.PrivacyLevel.guild_only,
                 image=image_binary,
             )
+            record_pushed_event(new_event.id, image_binary, description_key)
             logger.info(
                 f"Created new event: {new_event.name}, Start Time: {new_event.start_time.astimezone().strftime('%Y-%m-%d %I:%M %p')}"
             )
+        return True
 
     except Exception as e:
         logger.error(f"Error managing 'We are' event: {e}", exc_info=True)
+        return False
 
 
 async def check_for_other_active_events(guild):
@@ -266,25 +375,90 @@ async def check_for_other_active_events(guild):
         return False
 
 
+def open_switch_changed_at(page):
+    """When HAL last saw the open switch change, or the scrape time if it does not say."""
+    for reading in page.sensors:
+        if 'switch' in reading.name.lower() or 'open' in reading.name.lower():
+            try:
+                return parse_hal_timestamp(reading.last_update)
+            except ValueError:
+                break
+    return page.fetched_at.astimezone()
+
+
+def scrape_page(url):
+    """Fetch the HAL page once and read the status, sensors, SVG and switch change time from it."""
+    page = fetch_hal_page(url)
+    if page is None:
+        return fetch_lab_status_and_sensors(page), None, None
+    return fetch_lab_status_and_sensors(page), page.svg, open_switch_changed_at(page)
+
+
+async def scrape_and_render():
+    """
+    Scrape HAL and render the synoptic view image without blocking the event loop.
+
+    The page is fetched and parsed once in a worker thread; its SVG is then
+    rasterized to PNG bytes in RENDER_EXECUTOR, so the image and the sensor
+    text come from the same snapshot. If rendering fails, the last good image
+    is reused (falling back to SCALED_PNG_FILE on the first tick).
+    """
+    global last_image_binary
+    loop = asyncio.get_running_loop()
+    scrape_result, svg_content, switch_changed_at = await asyncio.to_thread(PROFILER.wrap(scrape_page), LAB_URL)
+    if scrape_result[0] is None:
+        return scrape_result, None, None
+
+    image_binary = None
+    if svg_content:
+        with timed('svg_render'):
+            image_binary = await loop.run_in_executor(
+                RENDER_EXECUTOR,
+                functools.partial(
+                    PROFILER.wrap(generate_scaled_cropped_synoptic_view_image),
+                    svg_content=svg_content
+                )
+            )
+        if image_binary is None:
+            PHASE_FAILURES.inc(phase='svg_render')
+    else:
+        logger.error(f"SVG with ID {SYNOPTIC_SVG_ID} not found on the page.")
+
+    if image_binary is not None:
+        last_image_binary = image_binary
+    elif last_image_binary is None:
+        last_image_binary = await asyncio.to_thread(get_image_as_binary, SCALED_PNG_FILE)
+    return scrape_result, last_image_binary, switch_changed_at
+
+
 @tasks.loop(minutes=5)
 async def post_lab_status():
     """Task to post or update lab status event every 5 minutes."""
+    async with PROFILER.iteration():
+        with timed('status_tick'):
+            await update_lab_status()
+
+
+async def update_lab_status():
+    """One status tick: scrape HAL, render the image and update the 'We are' event."""
+    global last_lab_status, pending_status_change_at
     try:
-        # Scrape lab status and sensor data
-        lab_status, sensor_data, scrape_timestamp = fetch_lab_status_and_sensors(
-            LAB_URL
-        )
+        # Scrape lab status and sensor data, and generate the scaled and
+        # cropped synoptic view image, off the event loop
+        (lab_status, sensor_data, scrape_timestamp), image_binary, switch_changed_at = await scrape_and_render()
         if lab_status is None or not sensor_data:
             logger.warning("Failed to scrape lab status or sensor data.")
             return
 
-        # Generate and save the scaled and cropped synoptic view image
-        generate_scaled_cropped_synoptic_view_image(
-            output_png_file=SCALED_PNG_FILE
-        )
+        if last_lab_status is not None and lab_status != last_lab_status:
+            pending_status_change_at = switch_changed_at
+        last_lab_status = lab_status
 
+        SENSOR_HISTORY.record(
+            time.time(), lab_status, [(row['Sensor'], row['Status']) for row in sensor_data]
+        )
         formatted_message = format_sensor_data(
-            lab_status, sensor_data, scrape_timestamp, LAB_URL
+            lab_status, sensor_data, scrape_timestamp, LAB_URL, format_trends(SENSOR_HISTORY)
         )
 
         guild = bot.get_guild(GUILD_ID)
@@ -292,15 +466,20 @@ async def post_lab_status():
             logger.error(f"Guild with ID {GUILD_ID} not found.")
             return
 
-        image_binary = get_image_as_binary(SCALED_PNG_FILE)
         if image_binary is None:
             logger.error("Image binary data is None. Skipping event update.")
             return
 
         # Manage the 'We are' event
-        await manage_lab_status_event(
-            guild, lab_status, formatted_message, image_binary
-        )
+        with timed('status_event_update'):
+            shown = await manage_lab_status_event(
+                guild, lab_status, formatted_message,
+                description_fingerprint(lab_status, sensor_data), image_binary
+            )
+        if shown and pending_status_change_at is not None:
+            lag = datetime.now().astimezone() - pending_status_change_at
+            STATUS_CHANGE_LAG_SECONDS.observe(max(0.0, lag.total_seconds()))
+            pending_status_change_at = None
 
     except Exception as e:
         logger.error(f"Error in post_lab_status: {e}", exc_info=True)
@@ -312,15 +491,26 @@ async def before_post_lab_status():
     await bot.wait_until_ready()
 
 
-@bot.event
+@bot.listen()
 async def on_ready():
     """Event handler when the bot is ready."""
+    if not loop_enabled(STATUS_LOOP):
+        return
     logger.info(f"Bot {bot.user.name} has connected to Discord.")
+    history_file = load_bot_config().get(SENSOR_HISTORY_FILE)
+    # Replaying the segments (up to about 16 MB of CSV) would stall the
+    # gateway on the event loop; the lock keeps a reconnect from replaying twice
+    async with SENSOR_HISTORY_LOCK:
+        if history_file and SENSOR_HISTORY.segment_path is None:
+            try:
+                await asyncio.to_thread(SENSOR_HISTORY.open_segment, history_file)
+            except OSError as e:
+                logger.error(f"Cannot open sensor history file '{history_file}': {e}")
     if not post_lab_status.is_running():
         post_lab_status.start()
 
 
-@bot.event
+@bot.listen()
 async def on_disconnect():
     """Event handler when the bot disconnects."""
     logger.warning(
@@ -328,38 +518,28 @@ async def on_disconnect():
     )
 
 
-@bot.event
+@bot.listen()
 async def on_resumed():
     """Event handler when the bot resumes after a disconnect."""
     logger.info(f"Bot {bot.user.name} has reconnected to Discord.")
-    if not post_lab_status.is_running():
+    if loop_enabled(STATUS_LOOP) and not post_lab_status.is_running():
         post_lab_status.start()
 
 
-@bot.event
+@bot.listen()
 async def on_shard_disconnect(shard_id):
     """Event handler for shard disconnections."""
     logger.warning(f"Shard {shard_id} disconnected.")
 
 
-@bot.event
+@bot.listen()
 async def on_shard_connect(shard_id):
     """Event handler for shard reconnections."""
     logger.info(f"Shard {shard_id} reconnected.")
-    if not post_lab_status.is_running():
+    if loop_enabled(STATUS_LOOP) and not post_lab_status.is_running():
         post_lab_status.start()
 
 
-@bot.event
-async def on_error(event_method, *args, **kwargs):
-    """Global error handler."""
-    logger.error(
-        f"Error in {event_method}: {args}, {kwargs}", exc_info=True
-    )
-
-
-# Run the bot
-try:
-    bot.run(TOKEN)
-except Exception as e:
-    logger.critical(f"Critical error running the bot: {e}", exc_info=True)
+# Run only the status loop; run_maglab_bots.py hosts it together with the calendar sync
+if __name__ == '__main__':
+    run_bot([STATUS_LOOP])
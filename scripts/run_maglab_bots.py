@@ -0,0 +1,28 @@
+"""
+Run the open status loop and the calendar sync in one process.
+
+Both loops share one Discord connection and guild cache (shared_bot.bot),
+one scheduled-event write queue and one HTTP session. Each loop can be
+switched off in bot_config.json, e.g. {"status_loop": true, "calendar_sync": false};
+without the file both run. Metrics for both loops are served on
+http://127.0.0.1:9464/metrics (set "metrics_port" to change it, 0 to disable). With --dry-run only the calendar sync plan is
+printed, as with the standalone script.
+"""
+import sys
+import logging
+
+# Importing the bot modules registers their loops and listeners on shared_bot.bot
+import report_maglab_open_status_on_discord_events  # noqa: F401
+import sync_multiple_google_calendars_to_discord_events  # noqa: F401
+from shared_bot import CALENDAR_LOOP, LOOPS, load_bot_config, run_bot
+
+if __name__ == '__main__':
+    if '--dry-run' in sys.argv:
+        loops = [CALENDAR_LOOP]
+    else:
+        config = load_bot_config()
+        loops = [name for name in LOOPS if config.get(name)]
+    if not loops:
+        logging.critical("Every loop is disabled in the bot config. Nothing to run.")
+        raise SystemExit("No loops enabled.")
+    run_bot(loops)
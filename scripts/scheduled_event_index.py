@@ -0,0 +1,77 @@
+import time
+import logging
+
+
+class ScheduledEventIndex:
+    """
+    In-memory mirror of each guild's scheduled events, kept current from the
+    gateway's scheduled-event create/update/delete dispatches.
+
+    Every event is stored together with its match key (computed once by
+    key_func when the event changes), so reconciliation can read keyed events
+    without a REST listing. A full listing is only needed to seed a guild and
+    as a periodic consistency check.
+    """
+
+    def __init__(self, key_func, refresh_interval=12 * 60 * 60):
+        self.key_func = key_func
+        self.refresh_interval = refresh_interval
+        self._events = {}
+        self._refreshed_at = {}
+
+    def needs_refresh(self, guild_id):
+        """True when the guild was never seeded or its last full refresh is stale."""
+        refreshed_at = self._refreshed_at.get(guild_id)
+        return refreshed_at is None or time.monotonic() - refreshed_at >= self.refresh_interval
+
+    def mark_stale(self):
+        """
+        Require a full refresh of every guild before its next use.
+
+        Called when a new gateway session starts: dispatches missed while
+        disconnected are not replayed, so the mirror may be out of date.
+        """
+        self._refreshed_at.clear()
+
+    def replace(self, guild_id, events):
+        """Reseed a guild from a full listing, logging any drift from the mirror."""
+        previous = self._events.get(guild_id)
+        self._events[guild_id] = {}
+        for event in events:
+            self.upsert(event)
+        self._refreshed_at[guild_id] = time.monotonic()
+
+        if previous is not None:
+            current = self._events[guild_id]
+            missing = current.keys() - previous.keys()
+            stale = previous.keys() - current.keys()
+            changed = sum(
+                1 for event_id in current.keys() & previous.keys()
+                if current[event_id][0] != previous[event_id][0]
+            )
+            if missing or stale or changed:
+                logging.warning(
+                    f"Scheduled event cache drift in guild {guild_id}: "
+                    f"{len(missing)} missing, {len(stale)} stale, {changed} changed"
+                )
+
+    def upsert(self, event):
+        """Add or update one event."""
+        try:
+            key = self.key_func(event)
+        except Exception as e:
+            logging.error(f"Error processing event '{event.name}': {e}")
+            return
+        self._events.setdefault(event.guild_id, {})[event.id] = (key, event)
+
+    def remove(self, event):
+        """Forget one event."""
+        self._events.get(event.guild_id, {}).pop(event.id, None)
+
+    def keyed_events(self, guild_id):
+        """Return the guild's events as a list of (key, event) pairs."""
+        return list(self._events.get(guild_id, {}).values())
+
+    def events(self, guild_id):
+        """Return the guild's events."""
+        return [event for _, event in self._events.get(guild_id, {}).values()]
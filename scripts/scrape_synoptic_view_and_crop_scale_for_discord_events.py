@@ -1,13 +1,18 @@
-import requests
 from bs4 import BeautifulSoup
 import os
 import platform
-from PIL import Image
 import logging
 
 
-# Set up logging to log errors for troubleshooting and uptime monitoring
-logging.basicConfig(filename='synoptic_view_image_errors.log', level=logging.ERROR, format='%(asctime)s %(levelname)s:%(message)s')
+# Set up logging to log errors for troubleshooting and uptime monitoring. A
+# named logger with its own file, so importing this module from the bots does
+# not configure (and claim) the root logger
+logger = logging.getLogger('synoptic_view')
+logger.setLevel(logging.ERROR)
+logger.propagate = False
+_error_log = logging.FileHandler('synoptic_view_image_errors.log', delay=True)
+_error_log.setFormatter(logging.Formatter('%(asctime)s %(levelname)s:%(message)s'))
+logger.addHandler(_error_log)
 
 # Check if the system is Windows and update the PATH environment variable
 if platform.system() == "Windows":
@@ -15,11 +20,13 @@ if platform.system() == "Windows":
 
 import cairosvg
 
+from http_session import SESSION
+
 
 def scrape_svg(url, svg_id):
     try:
         # Fetch the webpage content
-        response = requests.get(url)
+        response = SESSION.get(url, timeout=10)
         soup = BeautifulSoup(response.content, 'lxml')
 
         # Find the SVG element by its ID
@@ -27,10 +34,10 @@ def scrape_svg(url, svg_id):
         if svg_element:
             return str(svg_element)
         else:
-            logging.error(f"SVG with ID {svg_id} not found on the page.")
+            logger.error(f"SVG with ID {svg_id} not found on the page.")
             return None
     except Exception as e:
-        logging.error(f"Error while scraping SVG: {e}")
+        logger.error(f"Error while scraping SVG: {e}")
         return None
 
 
@@ -43,62 +50,77 @@ def ensure_emoji_font(svg_content):
         )
         return svg_content
     except Exception as e:
-        logging.error(f"Error while ensuring emoji font: {e}")
+        logger.error(f"Error while ensuring emoji font: {e}")
         return svg_content
 
 
-def save_scaled_png(svg_content, scaled_png_file, crop_box=(180, 72, 1000, 540), target_width=880, target_height=352):
-    try:
-        # Define default width and height for the SVG
-        width = "1000"
-        height = "1000"
+# Viewport the scraped SVG is laid out in; the crop box is in these units
+SVG_VIEWPORT_SIZE = 1000
 
-        # Add width and height to the SVG content if not present
-        svg_with_size = f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}">\n' + svg_content + '</svg>'
 
-        # Ensure the emoji font is included
-        svg_with_size = ensure_emoji_font(svg_with_size)
+def render_scaled_png(svg_content, crop_box=(180, 72, 1000, 540), target_width=880, target_height=352):
+    """
+    Render the cropped region of the SVG straight to PNG bytes at the target size.
 
-        # Convert SVG to PNG using CairoSVG
-        temp_png_file = 'temp_image.png'
-        cairosvg.svg2png(bytestring=svg_with_size.encode('utf-8'), write_to=temp_png_file)
+    The crop box becomes the viewBox of the wrapping SVG, so CairoSVG rasterizes
+    only that region at the final resolution; nothing touches the disk. The
+    scraped SVG has no width/height, so it is placed in an inner 1000x1000
+    viewport, as the full-page render used to be: its default 100% size must
+    resolve against that, not against the crop box.
+    """
+    left, top, right, bottom = crop_box
+    svg_with_size = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{target_width}" height="{target_height}" '
+        f'viewBox="{left} {top} {right - left} {bottom - top}" preserveAspectRatio="none">\n'
+        f'<svg width="{SVG_VIEWPORT_SIZE}" height="{SVG_VIEWPORT_SIZE}">\n'
+        + svg_content + '</svg></svg>'
+    )
 
-        # Crop and resize the PNG
-        with Image.open(temp_png_file) as img:
-            cropped_img = img.crop(crop_box)
-            resized_img = cropped_img.resize((target_width, target_height))
-            resized_img.save(scaled_png_file)
+    # Ensure the emoji font is included
+    svg_with_size = ensure_emoji_font(svg_with_size)
 
-        #print(f"Rescaled PNG image saved as {scaled_png_file}")
+    return cairosvg.svg2png(bytestring=svg_with_size.encode('utf-8'))
 
-        # Remove the temporary PNG file
-        os.remove(temp_png_file)
 
+def save_scaled_png(svg_content, scaled_png_file, crop_box=(180, 72, 1000, 540), target_width=880, target_height=352):
+    try:
+        png_bytes = render_scaled_png(svg_content, crop_box, target_width, target_height)
+        with open(scaled_png_file, 'wb') as png_file:
+            png_file.write(png_bytes)
+        return png_bytes
     except Exception as e:
-        logging.error(f"Error while saving scaled PNG: {e}")
+        logger.error(f"Error while saving scaled PNG: {e}")
+        return None
 
 
-def generate_scaled_cropped_synoptic_view_image(output_png_file, url='https://www.maglaboratory.org/hal',
-                                                svg_id='maglab-synoptic-view'):
+def generate_scaled_cropped_synoptic_view_image(output_png_file=None, url='https://www.maglaboratory.org/hal',
+                                                svg_id='maglab-synoptic-view', svg_content=None):
     """
-    Callable function to generate the scaled PNG file from the given URL and SVG ID.
+    Callable function to generate the scaled PNG from the given URL and SVG ID.
 
     Args:
-    - output_png_file (str): The path to save the final scaled PNG file.
+    - output_png_file (str): Optional path to also save the final scaled PNG file.
     - url (str): The URL to scrape the SVG from (default is MAGLab).
     - svg_id (str): The SVG ID to target (default is 'maglab-synoptic-view').
+    - svg_content (str): Already scraped SVG markup; when given, the URL is not fetched.
+
+    Returns:
+    - bytes: The PNG image, or None if it could not be generated.
     """
     try:
-        # Scrape the SVG element from the website
-        svg_content = scrape_svg(url, svg_id)
+        # Scrape the SVG element from the website unless the caller already has it
+        if svg_content is None:
+            svg_content = scrape_svg(url, svg_id)
 
-        if svg_content:
-            # Save only the scaled PNG
-            save_scaled_png(svg_content, output_png_file)
-        else:
-            logging.error("Failed to generate PNG. SVG content not found.")
+        if not svg_content:
+            logger.error("Failed to generate PNG. SVG content not found.")
+            return None
+        if output_png_file:
+            return save_scaled_png(svg_content, output_png_file)
+        return render_scaled_png(svg_content)
     except Exception as e:
-        logging.error(f"Error in generate_scaled_cropped_synoptic_view_image: {e}")
+        logger.error(f"Error in generate_scaled_cropped_synoptic_view_image: {e}")
+        return None
 
 
 # Example usage as a callable function
@@ -107,4 +129,4 @@ if __name__ == '__main__':
     try:
         generate_scaled_cropped_synoptic_view_image('maglab_synoptic_view_scaled.png')
     except Exception as e:
-        logging.error(f"Error while running the script: {e}")
\ No newline at end of file
+        logger.error(f"Error while running the script: {e}")
\ No newline at end of file
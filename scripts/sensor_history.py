@@ -0,0 +1,253 @@
+import os
+import re
+import csv
+import logging
+from array import array
+
+NUMBER = re.compile(r'^\s*(-?\d+(?:\.\d+)?)\s*(.*)$')
+
+LAB_STATUS = 'Lab Status'  # Series name the open/closed status is recorded under
+
+# (bucket seconds, buckets kept): a day of minutes, a month of hours, a year of days
+TIERS = ((60, 24 * 60), (60 * 60, 30 * 24), (24 * 60 * 60, 366))
+
+SEGMENT_MAX_BYTES = 8 * 1024 * 1024
+
+
+def parse_reading(text):
+    """Split a sensor status like '68.0 °F' into (68.0, '°F'); (None, text) if not numeric."""
+    match = NUMBER.match(text)
+    if match is None:
+        return None, text
+    return float(match.group(1)), match.group(2).strip()
+
+
+class _Ring:
+    """Fixed-capacity ring over parallel typed arrays; grows until full, then overwrites the oldest."""
+
+    def __init__(self, capacity, typecodes):
+        self.capacity = capacity
+        self.columns = [array(typecode) for typecode in typecodes]
+        self.head = 0  # Index of the oldest row once full
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def append(self, *row):
+        if len(self) < self.capacity:
+            for column, value in zip(self.columns, row):
+                column.append(value)
+        else:
+            for column, value in zip(self.columns, row):
+                column[self.head] = value
+            self.head = (self.head + 1) % self.capacity
+
+    def rows(self):
+        """Rows from oldest to newest."""
+        count = len(self)
+        for offset in range(count):
+            index = (self.head + offset) % count
+            yield tuple(column[index] for column in self.columns)
+
+    def nbytes(self):
+        return sum(column.itemsize * len(column) for column in self.columns)
+
+
+class SeriesTier:
+    """One resolution of a numeric series: closed buckets of (start, min, max, mean, count)."""
+
+    def __init__(self, resolution, capacity):
+        self.resolution = resolution
+        self.ring = _Ring(capacity, ('d', 'f', 'f', 'f', 'I'))
+        self.current = None  # [start, min, max, sum, count] of the open bucket
+
+    def add(self, timestamp, value):
+        start = timestamp - timestamp % self.resolution
+        current = self.current
+        if current is not None and current[0] == start:
+            current[1] = min(current[1], value)
+            current[2] = max(current[2], value)
+            current[3] += value
+            current[4] += 1
+            return
+        if current is not None:
+            self.ring.append(current[0], current[1], current[2], current[3] / current[4], current[4])
+        self.current = [start, value, value, value, 1]
+
+    def oldest(self):
+        """Start of the oldest bucket still held, or None if empty."""
+        for row in self.ring.rows():
+            return row[0]
+        return self.current[0] if self.current else None
+
+    def buckets(self, since=0.0):
+        """(start, min, max, mean, count) for buckets starting at or after since, open bucket included."""
+        for row in self.ring.rows():
+            if row[0] >= since:
+                yield row
+        if self.current is not None and self.current[0] >= since:
+            start, low, high, total, count = self.current
+            yield start, low, high, total / count, count
+
+
+class SensorSeries:
+    """A numeric sensor downsampled into minute, hour and day tiers."""
+
+    def __init__(self, unit='', tiers=TIERS):
+        self.unit = unit
+        self.tiers = [SeriesTier(resolution, capacity) for resolution, capacity in tiers]
+        self.last = None
+
+    def add(self, timestamp, value):
+        for tier in self.tiers:
+            tier.add(timestamp, value)
+        self.last = (timestamp, value)
+
+    def summary(self, since):
+        """(min, max, mean) since the given time, from the finest tier that still covers it."""
+        for tier in self.tiers:
+            oldest = tier.oldest()
+            if oldest is not None and oldest <= since:
+                break
+        else:
+            tier = self.tiers[0]  # History starts after since; the finest tier still holds all of it
+        since_bucket = since - since % tier.resolution
+        buckets = list(tier.buckets(since_bucket))
+        if not buckets:
+            return None
+        count = sum(bucket[4] for bucket in buckets)
+        return (
+            min(bucket[1] for bucket in buckets),
+            max(bucket[2] for bucket in buckets),
+            sum(bucket[3] * bucket[4] for bucket in buckets) / count,
+        )
+
+
+class StateLog:
+    """
+    State transitions of a non-numeric sensor (e.g. open/closed), kept only when the state changes.
+
+    States are stored as 'H' codes into self.states. Once max_states texts
+    have been seen, the codes are rebuilt from the states the ring still
+    holds, so a sensor with ever-new texts cannot overflow the code column.
+    """
+
+    def __init__(self, capacity=1024, max_states=4096):
+        self.ring = _Ring(capacity, ('d', 'H'))
+        self.states = []  # State code -> text
+        self._codes = {}  # Text -> state code
+        self.max_states = max(max_states, capacity + 1)
+        self.current = None
+
+    def add(self, timestamp, state):
+        if state == self.current:
+            return
+        code = self._codes.get(state)
+        if code is None:
+            if len(self.states) >= self.max_states:
+                self._compact()
+            code = self._codes[state] = len(self.states)
+            self.states.append(state)
+        self.ring.append(timestamp, code)
+        self.current = state
+
+    def _compact(self):
+        """Drop the states no row of the ring refers to any more, renumbering the rest."""
+        codes = self.ring.columns[1]
+        used = sorted(set(codes))
+        renumbered = {old: new for new, old in enumerate(used)}
+        for index, code in enumerate(codes):
+            codes[index] = renumbered[code]
+        self.states = [self.states[old] for old in used]
+        self._codes = {state: code for code, state in enumerate(self.states)}
+
+    def duration(self, state, since, until):
+        """Seconds spent in state between since and until."""
+        total = 0.0
+        previous_time, previous_state = None, None
+        for timestamp, code in self.ring.rows():
+            if previous_state == state:
+                total += max(0.0, min(timestamp, until) - max(previous_time, since))
+            previous_time, previous_state = timestamp, self.states[code]
+        if previous_state == state:
+            total += max(0.0, until - max(previous_time, since))
+        return total
+
+
+class SensorHistory:
+    """
+    Bounded history of the HAL readings: a SensorSeries per numeric sensor
+    and a StateLog per text sensor and for the lab's open/closed status.
+
+    Memory is fixed by the ring capacities whatever the uptime. With
+    open_segment(), every scrape is also appended to a CSV segment on disk
+    and replayed on start, so trends survive restarts; the segment is
+    rotated once it reaches SEGMENT_MAX_BYTES.
+    """
+
+    def __init__(self):
+        self.series = {}
+        self.state_logs = {}
+        self._segment = None
+        self._writer = None
+        self.segment_path = None
+
+    def record(self, timestamp, lab_status, readings):
+        """Add one scrape: lab_status and an iterable of (sensor name, status text)."""
+        readings = [(LAB_STATUS, lab_status)] + list(readings)
+        for name, text in readings:
+            self._add(timestamp, name, text)
+        if self._writer is not None:
+            try:
+                self._writer.writerows((f'{timestamp:.0f}', name, text) for name, text in readings)
+                self._segment.flush()
+                if self._segment.tell() >= SEGMENT_MAX_BYTES:
+                    self._rotate()
+            except OSError as e:
+                logging.error(f"Error writing sensor history to {self.segment_path}: {e}")
+
+    def _add(self, timestamp, name, text):
+        value, unit = parse_reading(text)
+        if value is not None:
+            series = self.series.get(name)
+            if series is None:
+                # A sensor first read as text (e.g. 'Unavailable') is numeric from its first number on
+                self.state_logs.pop(name, None)
+                series = self.series[name] = SensorSeries(unit)
+            series.add(timestamp, value)
+        elif name not in self.series:
+            self.state_logs.setdefault(name, StateLog()).add(timestamp, text)
+
+    def open_segment(self, path):
+        """Replay an existing segment (previous one included) and append new scrapes to it."""
+        for replay_path in (path + '.1', path):
+            try:
+                with open(replay_path, newline='', encoding='utf-8') as segment:
+                    for row in csv.reader(segment):
+                        if len(row) == 3:
+                            self._add(float(row[0]), row[1], row[2])
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                logging.error(f"Error replaying sensor history from {replay_path}: {e}")
+        self.segment_path = path
+        self._segment = open(path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._segment)
+
+    def _rotate(self):
+        self._segment.close()
+        os.replace(self.segment_path, self.segment_path + '.1')
+        self._segment = open(self.segment_path, 'a', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._segment)
+
+    def open_duration(self, open_status, since, until):
+        """Seconds the lab spent in open_status between since and until."""
+        state_log = self.state_logs.get(LAB_STATUS)
+        return state_log.duration(open_status, since, until) if state_log else 0.0
+
+    def nbytes(self):
+        """Bytes held in the ring buffers."""
+        return (
+            sum(tier.ring.nbytes() for series in self.series.values() for tier in series.tiers) +
+            sum(state_log.ring.nbytes() for state_log in self.state_logs.values())
+        )
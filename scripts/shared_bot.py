@@ -0,0 +1,104 @@
+import json
+import logging
+
+import discord
+from discord.ext import commands
+
+from calendar_registry import DEFAULT_CALENDARS
+from discord_write_queue import MAX_RATELIMIT_TIMEOUT, DiscordWriteQueue, RateLimitCounter
+from loop_profiler import PROFILE_DIR, configure_profilers
+from metrics import start_metrics_server
+
+TOKEN_FILE = 'discord_token.txt'
+CONFIG_FILE = 'bot_config.json'
+GUILD_ID = 697971426799517774  # Home guild: the status event, and the calendar sync by default
+
+# Loop names, also the on/off keys in CONFIG_FILE
+STATUS_LOOP = 'status_loop'
+CALENDAR_LOOP = 'calendar_sync'
+LOOPS = (STATUS_LOOP, CALENDAR_LOOP)
+METRICS_PORT = 'metrics_port'  # Local Prometheus endpoint; 0 or null turns it off
+PROFILE_SLOWEST = 'profile_slowest'  # Keep profiles of the N slowest iterations per loop; 0 is off
+PROFILE_DIRECTORY = 'profile_dir'
+CALENDAR_GUILDS = 'calendar_guilds'  # Guild IDs the calendars are mirrored into
+CALENDARS = 'calendars'  # Calendar registry: feeds and their refresh and sync settings (calendar_registry.CalendarFeed)
+SENSOR_HISTORY_FILE = 'sensor_history_file'  # Append-only CSV of HAL readings; null keeps history in memory only
+DEFAULT_CONFIG = {
+    STATUS_LOOP: True,
+    CALENDAR_LOOP: True,
+    CALENDAR_GUILDS: [GUILD_ID],
+    CALENDARS: DEFAULT_CALENDARS,
+    METRICS_PORT: 9464,
+    PROFILE_SLOWEST: 0,
+    PROFILE_DIRECTORY: PROFILE_DIR,
+    SENSOR_HISTORY_FILE: None,
+}
+
+# Shared queue for all scheduled-event writes (bounded concurrency, retries),
+# so the status event and the calendar sync are throttled together
+WRITE_QUEUE = DiscordWriteQueue()
+
+# Loops the running entry point turned on; each module's listeners check it
+ENABLED_LOOPS = set()
+
+# One gateway connection and guild cache for every loop in this process
+intents = discord.Intents.default()
+intents.guilds = True
+intents.guild_scheduled_events = True
+bot = commands.Bot(command_prefix='!', intents=intents, max_ratelimit_timeout=MAX_RATELIMIT_TIMEOUT)
+
+# 429s discord.py waits out itself never reach WRITE_QUEUE; count them from its log
+logging.getLogger('discord.http').addFilter(RateLimitCounter())
+
+
+def get_discord_token():
+    """Retrieve the Discord bot token from a file."""
+    try:
+        with open(TOKEN_FILE, 'r') as token_file:
+            return token_file.read().strip()
+    except FileNotFoundError:
+        logging.error(f"'{TOKEN_FILE}' not found.")
+        return None
+
+
+def load_bot_config(path=CONFIG_FILE):
+    """Read the loop on/off switches; a missing file enables every loop."""
+    config = dict(DEFAULT_CONFIG)
+    try:
+        with open(path, 'r') as config_file:
+            config.update(json.load(config_file))
+    except FileNotFoundError:
+        pass
+    return config
+
+
+def loop_enabled(name):
+    """True when the running entry point turned this loop on."""
+    return name in ENABLED_LOOPS
+
+
+@bot.event
+async def on_error(event_method, *args, **kwargs):
+    """Global error handler."""
+    logging.error(f"Error in {event_method}: {args}, {kwargs}", exc_info=True)
+
+
+def run_bot(loops):
+    """Connect to Discord and run the given loops until the bot is closed."""
+    token = get_discord_token()
+    if not token:
+        logging.critical("Discord token is missing. Exiting the bot.")
+        raise SystemExit("Discord token is missing.")
+
+    ENABLED_LOOPS.update(loops)
+    config = load_bot_config()
+    if config.get(METRICS_PORT):
+        start_metrics_server(int(config[METRICS_PORT]))
+    if config.get(PROFILE_SLOWEST):
+        configure_profilers(int(config[PROFILE_SLOWEST]), config.get(PROFILE_DIRECTORY) or PROFILE_DIR)
+        logging.info(f"Profiling the {config[PROFILE_SLOWEST]} slowest iterations of each loop")
+    logging.info(f"Starting bot with loops: {', '.join(sorted(ENABLED_LOOPS)) or 'none'}")
+    try:
+        bot.run(token)
+    except Exception as e:
+        logging.critical(f"Critical error running the bot: {e}", exc_info=True)
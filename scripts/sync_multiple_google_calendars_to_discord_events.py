@@ -1,3 +1,6 @@
+import sys
+import time
+import asyncio
 import discord
 import requests
 import datetime
@@ -6,48 +9,79 @@ import html
 import pendulum
 from icalendar import Calendar, Event
 from dateutil.rrule import rrulestr
-from discord.ext import tasks, commands
+from discord.ext import tasks
 import traceback
+import functools
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
-# Setup logging to file and console
-logging.basicConfig(
-    filename='discord_events_sync.log',
-    level=logging.INFO,  # Set to INFO for cleaner logs
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%Y-%m-%d %I:%M %p'
+from adaptive_sync_schedule import AdaptiveSyncSchedule
+from calendar_registry import (
+    DEFAULT_LOCATION, DESCRIPTION_MAX_LENGTH, SYNC_DAYS, FeedScheduler, load_calendars
+)
+from scheduled_event_index import ScheduledEventIndex
+from event_mapping_store import EventMappingStore, event_fingerprint, occurrence_start_key
+from recurrence_cache import RecurrenceCache
+from ics_window import window_ics
+from ics_feed_cache import FeedCache, conditional_headers, content_hash, covers_window, select_window
+from http_session import SESSION
+from loop_profiler import LoopProfiler
+from metrics import PHASE_FAILURES, PHASE_SECONDS, timed
+from shared_bot import (
+    CALENDAR_GUILDS, CALENDAR_LOOP, CALENDARS, GUILD_ID, WRITE_QUEUE, bot as client, load_bot_config, loop_enabled, run_bot
 )
 
-console = logging.StreamHandler()
-console.setLevel(logging.INFO)
+# Setup logging to file and console on the root logger, which the shared
+# modules (write queue, metrics, profiler) also log to. Handlers are added
+# explicitly rather than with basicConfig, so they are installed whatever
+# was imported first in the combined runner.
 formatter = logging.Formatter(
     '%(asctime)s - %(levelname)s - %(message)s', datefmt='%Y-%m-%d %I:%M %p')
-console.setFormatter(formatter)
-logging.getLogger().addHandler(console)
 
-# Read the Discord token from a file named 'discord_token.txt'
-def get_discord_token():
-    with open('discord_token.txt', 'r') as file:
-        return file.read().strip()
+file_handler = logging.FileHandler('discord_events_sync.log')
+file_handler.setFormatter(formatter)
 
-DISCORD_TOKEN = get_discord_token()
-GUILD_ID = 697971426799517774  # Replace with your actual Guild ID
-
-# Updated ICS URLs
-ICS_URLS = [
-    'https://calendar.google.com/calendar/ical/c_3keov3j3lc5qscq754mb4n38b4%40group.calendar.google.com/public/basic.ics',
-    'https://calendar.google.com/calendar/ical/bjpkvaeg1rjq9u3c6utecq1jos%40group.calendar.google.com/public/basic.ics',
-]
+console = logging.StreamHandler()
+console.setLevel(logging.INFO)
+console.setFormatter(formatter)
 
-SYNC_DAYS = 7
-DESCRIPTION_MAX_LENGTH = 1000
+root_logger = logging.getLogger()
+root_logger.setLevel(logging.INFO)  # Set to INFO for cleaner logs
+root_logger.addHandler(file_handler)
+root_logger.addHandler(console)
+
+RESYNC_DELAY_SECONDS = 30  # Debounce before re-syncing after a manual event edit
+OWN_WRITE_GRACE_SECONDS = 120  # Gateway updates this soon after our own writes are not manual edits
+EXPANSION_HORIZON_DAYS = 1  # Expand past a feed's sync_days so cached occurrences stay valid across syncs
+
+HTTP_TIMEOUT_SECONDS = 20  # Per-request connect/read timeout for ICS downloads
+FEED_TIMEOUT_SECONDS = 60  # Overall budget per feed, download plus expansion
+
+FEED_CACHE = FeedCache()
+RECURRENCE_CACHE = RecurrenceCache()
+EVENT_STORE = EventMappingStore()
+SYNC_LOCKS = {}  # Guild ID -> asyncio.Lock; guilds reconcile concurrently, each one at a time
+SYNC_SCHEDULE = AdaptiveSyncSchedule(
+    min_interval=60,  # Poll every minute while feeds are changing
+    max_interval=15 * 60,  # Back off to 15 minutes when quiet
+    reconcile_interval=60 * 60,  # Full reconcile at least hourly as a consistency check
+)
+FEED_SCHEDULER = FeedScheduler()
+FEED_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix='ics-feed')
+PROFILER = LoopProfiler('calendar')  # Opt-in per-poll profiling (profile_slowest in bot_config.json)
 
 LA_TZ = pendulum.timezone('America/Los_Angeles')  # Timezone for Los Angeles
 
-intents = discord.Intents.default()
-intents.guilds = True
-#intents.scheduled_events = True  # Ensure the bot has access to scheduled events
-client = commands.Bot(command_prefix="!", intents=intents)
+# Run with --dry-run to print the sync plan once and exit without touching Discord
+DRY_RUN = '--dry-run' in sys.argv
+
+# Guilds the calendars are mirrored into, and the calendar registry; both are
+# read from bot_config.json when the bot is ready
+SYNC_GUILD_IDS = [GUILD_ID]
+CALENDAR_FEEDS = load_calendars(None)
+
+RECENT_WRITES = {}  # Discord event ID -> monotonic time of this bot's last write
+RESYNC_TASKS = {}  # Guild ID -> pending re-sync after a manual edit
 
 def normalize_date(dt):
     """Ensure dates are returned as timezone-aware datetime."""
@@ -81,301 +115,758 @@ def clean_description(description):
     description = re.sub(r'<[^>]+>', '', description)
     return html.unescape(description)
 
-def truncate_description(description):
-    """Clean and truncate the description to 1000 characters."""
+def truncate_description(description, max_length=DESCRIPTION_MAX_LENGTH):
+    """Clean and truncate the description to max_length (by default 1000) characters."""
     clean_desc = clean_description(description)
-    return clean_desc[:DESCRIPTION_MAX_LENGTH] if len(clean_desc) > DESCRIPTION_MAX_LENGTH else clean_desc
+    return clean_desc[:max_length] if len(clean_desc) > max_length else clean_desc
+
+def series_key(component, uid, raw_rrule, start):
+    """Identity of a recurring series; any edit to it changes the key."""
+    last_modified = component.get('last-modified')
+    return (
+        uid, raw_rrule, start.isoformat(), start.timezone_name,
+        str(component.get('sequence', 0)),
+        last_modified.dt.isoformat() if last_modified else '',
+    )
+
+def build_rrule(raw_rrule, start):
+    """Parse a series' RRULE; COUNT rules cannot be re-anchored on a later occurrence."""
+    rule = rrulestr(adjust_rrule_for_utc(raw_rrule, start), dtstart=start)
+    return rule, 'COUNT=' not in raw_rrule.upper()
+
+def expand_calendar(content, now, horizon, location=DEFAULT_LOCATION, description_max_length=DESCRIPTION_MAX_LENGTH):
+    """
+    Parse an ICS body and expand its occurrences between now and horizon.
+
+    Only the VEVENTs that can intersect the window are parsed (see
+    ics_window), so years of past one-off events cost a line scan rather
+    than a component tree. Events without a LOCATION get location;
+    descriptions are cut to description_max_length characters.
+
+    Returns two lists (events, canceled_events) of (window_time, event) pairs,
+    where window_time is the occurrence start for recurring events and the end
+    for one-off events, so the lists can be re-filtered for a later sync window.
+    """
+    events = []
+    canceled_events = []
+    default_location = location
+    parse_started = time.perf_counter()
+    calendar = Calendar.from_ical(window_ics(content, now, horizon))
+    expand_started = time.perf_counter()
+    PHASE_SECONDS.observe(expand_started - parse_started, phase='ics_parse')
+
+    # Collect every VEVENT in a single walk, indexing overrides and
+    # cancellations by (uid, normalized recurrence-id)
+    components = []
+    overrides = {}
+    canceled_occurrences = set()
+    canceled_uids = set()
+
+    for component in calendar.walk('VEVENT'):
+        components.append(component)
+        status = str(component.get('status', '')).upper()
+        uid = str(component.get('uid'))
+        recurrence_id = component.get('recurrence-id')
+        if recurrence_id:
+            # This is an exception or cancellation of a recurring event
+            key = (uid, normalize_date(recurrence_id.dt).in_tz('UTC'))
+            if status == 'CANCELLED':
+                canceled_occurrences.add(key)
+            else:
+                overrides.setdefault(key, component)
+        elif status == 'CANCELLED':
+            # Entire event is cancelled
+            canceled_uids.add(uid)
+
+    for component in components:
+        uid = str(component.get('uid'))
+        status = str(component.get('status', '')).upper()
+
+        # Skip entirely canceled events
+        if uid in canceled_uids:
+            continue
+
+        start = normalize_date(component.get('dtstart').dt)
+        end = normalize_date(component.get('dtend').dt)
+        timezone = start.timezone if start.timezone else pendulum.timezone('UTC')
+        start = start.in_tz(timezone)
+        end = end.in_tz(timezone)
+
+        summary = component.get('summary').strip()
+        description = truncate_description(
+            component.get('description', 'No description provided').strip(), description_max_length
+        )
+        location = component.get('location', default_location).strip()
+
+        if component.get('rrule'):
+            # Handle recurring events; unchanged series are extended from the
+            # previous sync's expansion instead of being re-expanded
+            raw_rrule = component.get('rrule').to_ical().decode('utf-8')
+            try:
+                occurrences = RECURRENCE_CACHE.between(
+                    series_key(component, uid, raw_rrule, start),
+                    functools.partial(build_rrule, raw_rrule, start),
+                    now.in_tz(timezone), horizon.in_tz(timezone))
+            except ValueError as e:
+                logging.error(f"RRULE error in {summary}: {e}")
+                continue
+            for occ in occurrences:
+                occ_start = pendulum.instance(occ, tz=timezone).replace(microsecond=0, second=0)
+                occ_end = occ_start + (end - start)
+                window_time = occ_start.in_tz('UTC')
+                key = (uid, window_time)
+
+                # Check for cancellations
+                if key in canceled_occurrences:
+                    canceled_events.append((window_time, {
+                        'uid': uid,
+                        'name': summary,
+                        'description': description,
+                        'start_time': occ_start.in_tz('UTC'),
+                        'end_time': occ_end.in_tz('UTC'),
+                        'location': location
+                    }))
+                    continue  # Skip this occurrence as it's cancelled
+
+                # Apply exceptions
+                ex = overrides.get(key)
+                if ex is not None:
+                    # Override with exception event
+                    events.append((window_time, {
+                        'uid': uid,
+                        'name': ex.get('summary', summary).strip(),
+                        'description': truncate_description(
+                            ex.get('description', description).strip(), description_max_length
+                        ),
+                        'start_time': occ_start.in_tz('UTC'),
+                        'end_time': (pendulum.instance(ex.get('dtend').dt, tz=timezone)).in_tz('UTC').replace(microsecond=0, second=0),
+                        'location': ex.get('location', location).strip()
+                    }))
+                else:
+                    # No exception matches, use original
+                    events.append((window_time, {
+                        'uid': uid,
+                        'name': summary,
+                        'description': description,
+                        'start_time': occ_start.in_tz('UTC'),
+                        'end_time': occ_end.in_tz('UTC'),
+                        'location': location
+                    }))
+        else:
+            # Non-recurring event
+            if now <= end <= horizon:
+                window_time = end.in_tz('UTC')
+                if status == 'CANCELLED':
+                    canceled_events.append((window_time, {
+                        'uid': uid,
+                        'name': summary,
+                        'description': description,
+                        'start_time': start.in_tz('UTC'),
+                        'end_time': end.in_tz('UTC'),
+                        'location': location
+                    }))
+                    continue  # Skip as it's cancelled
+
+                events.append((window_time, {
+                    'uid': uid,
+                    'name': summary,
+                    'description': description,
+                    'start_time': start.in_tz('UTC'),
+                    'end_time': end.in_tz('UTC'),
+                    'location': location
+                }))
+    RECURRENCE_CACHE.evict_idle()
+    PHASE_SECONDS.observe(time.perf_counter() - expand_started, phase='ics_expand')
+    return events, canceled_events
 
-def fetch_calendar_events():
-    """Fetch and return calendar events and canceled events for the next SYNC_DAYS."""
+def fetch_feed_occurrences(feed, now, refresh=True):
+    """
+    Fetch one feed of the registry with a conditional GET and return its expanded occurrences.
+
+    When the server answers 304 or the body hash matches the cached copy, the
+    download and Calendar.from_ical are skipped and the cached expansion is
+    reused as long as it still covers the feed's sync window. Without refresh
+    (the feed is not due) nothing is downloaded and the cached copy is used,
+    unless there is none yet.
+
+    Returns a dict with the in-window 'events' and 'canceled_events', whether
+    the feed 'changed', and 'next_entry', the time the next expanded
+    occurrence beyond the window slides into it.
+    """
+    url = feed.url
+    future = now.add(days=feed.sync_days)
+    cached = FEED_CACHE.load(url)
+    if cached and not refresh:
+        content = None
+        unchanged = True
+        meta = dict(cached)
+    else:
+        with timed('ics_fetch'):
+            response = SESSION.get(url, headers=conditional_headers(cached), timeout=HTTP_TIMEOUT_SECONDS)
+        if response.status_code == 304 and cached:
+            content = None
+            unchanged = True
+        else:
+            response.raise_for_status()
+            content = response.content
+            unchanged = cached is not None and cached.get('content_hash') == content_hash(content)
+
+        meta = dict(cached) if unchanged else {}
+        meta['etag'] = response.headers.get('ETag') or meta.get('etag')
+        meta['last_modified'] = response.headers.get('Last-Modified') or meta.get('last_modified')
+
+    settings = feed.expansion_settings()
+    if unchanged and covers_window(cached, now, future) and cached.get('settings') == settings:
+        logging.debug(f"Feed unchanged, reusing cached occurrences for {feed.name}")
+        if refresh:
+            FEED_CACHE.save(url, meta)
+    else:
+        if content is None:
+            content = FEED_CACHE.read_body(url)
+        horizon = future.add(days=EXPANSION_HORIZON_DAYS)
+        events, canceled_events = expand_calendar(
+            content, now, horizon, feed.location, feed.description_max_length
+        )
+        meta.update({
+            'content_hash': content_hash(content),
+            'settings': settings,
+            'expanded_from': now,
+            'expanded_until': horizon,
+            'events': events,
+            'canceled_events': canceled_events,
+        })
+        FEED_CACHE.save(url, meta, None if unchanged else content)
+
+    beyond_window = [
+        window_time for window_time, _ in meta['events'] + meta['canceled_events']
+        if window_time > future
+    ]
+    return {
+        'events': select_window(meta['events'], now, future),
+        'canceled_events': select_window(meta['canceled_events'], now, future),
+        'changed': not unchanged,
+        'next_entry': min(beyond_window).subtract(days=feed.sync_days) if beyond_window else None,
+    }
+
+def cached_feed_occurrences(feed, now):
+    """A feed's occurrences from FEED_CACHE alone, for when its refresh failed; None if it was never cached."""
+    if FEED_CACHE.load(feed.url) is None:
+        return None
+    return fetch_feed_occurrences(feed, now, refresh=False)
+
+async def fetch_calendar_snapshot(refresh=None):
+    """
+    Fetch calendar events and canceled events within each feed's sync window.
+
+    The feeds in refresh (all of them when None) are downloaded; the others
+    are served from FEED_CACHE. Feeds are expanded concurrently in
+    FEED_EXECUTOR so the event loop stays free, and each feed has its own
+    timeout. A feed whose refresh fails is served from its last cached copy;
+    if it has none it is listed in 'unavailable_feeds', so the reconcile
+    leaves Discord events it cannot account for alone. Every refreshed feed
+    is recorded in FEED_SCHEDULER. Returns a dict with 'events',
+    'canceled_events', whether any feed 'changed', the earliest
+    'next_entry' of an occurrence into the window, and 'unavailable_feeds'.
+    """
     events = []
     canceled_events = []
+    changed = False
+    next_entries = []
+    unavailable_feeds = []
+
+    def collect(result):
+        nonlocal changed
+        events.extend(result['events'])
+        canceled_events.extend(result['canceled_events'])
+        changed = changed or result['changed']
+        if result['next_entry'] is not None:
+            next_entries.append(result['next_entry'])
+
     try:
         now = pendulum.now('UTC')
-        future = now.add(days=SYNC_DAYS)
-
-        for url in ICS_URLS:
-            try:
-                response = requests.get(url)
-                response.raise_for_status()
-                calendar = Calendar.from_ical(response.content)
-
-                # Dictionaries to hold exceptions and cancellations
-                exceptions = {}
-                cancellations = {}
-
-                for component in calendar.walk():
-                    if component.name == "VEVENT":
-                        status = str(component.get('status', '')).upper()
-                        uid = str(component.get('uid'))
-                        recurrence_id = component.get('recurrence-id')
-                        if recurrence_id:
-                            # This is an exception or cancellation of a recurring event
-                            rec_id = normalize_date(recurrence_id.dt)
-                            if status == 'CANCELLED':
-                                cancellations.setdefault(uid, set()).add(rec_id)
-                            else:
-                                exceptions.setdefault(uid, []).append(component)
-                            continue
-                        elif status == 'CANCELLED':
-                            # Entire event is cancelled
-                            cancellations[uid] = 'ALL'
-                            continue
-
-                for component in calendar.walk():
-                    if component.name != "VEVENT":
-                        continue  # Skip non-VEVENT components
-
-                    uid = str(component.get('uid'))
-                    status = str(component.get('status', '')).upper()
-
-                    # Skip entirely canceled events
-                    if uid in cancellations and cancellations[uid] == 'ALL':
-                        continue
-
-                    start = normalize_date(component.get('dtstart').dt)
-                    end = normalize_date(component.get('dtend').dt)
-                    timezone = start.timezone if start.timezone else pendulum.timezone('UTC')
-                    start = start.in_tz(timezone)
-                    end = end.in_tz(timezone)
-
-                    summary = component.get('summary').strip()
-                    description = truncate_description(component.get('description', 'No description provided').strip())
-                    location = component.get('location', 'MAG Laboratory').strip()
-
-                    if component.get('rrule'):
-                        # Handle recurring events
-                        rrule_str = adjust_rrule_for_utc(
-                            component.get('rrule').to_ical().decode('utf-8'), start)
-                        try:
-                            rule = rrulestr(rrule_str, dtstart=start)
-                            occurrences = rule.between(
-                                now.in_tz(timezone), future.in_tz(timezone))
-                        except ValueError as e:
-                            logging.error(f"RRULE error in {summary}: {e}")
-                            continue
-                        for occ in occurrences:
-                            occ_start = pendulum.instance(occ, tz=timezone).replace(microsecond=0, second=0)
-                            occ_end = occ_start + (end - start)
-                            rec_id = occ_start
-
-                            # Check for cancellations
-                            if uid in cancellations and rec_id in cancellations[uid]:
-                                canceled_events.append({
-                                    'uid': uid,
-                                    'name': summary,
-                                    'description': description,
-                                    'start_time': occ_start.in_tz('UTC'),
-                                    'end_time': occ_end.in_tz('UTC'),
-                                    'location': location
-                                })
-                                continue  # Skip this occurrence as it's cancelled
-
-                            # Apply exceptions
-                            if uid in exceptions:
-                                for ex in exceptions[uid]:
-                                    ex_recurrence_id = normalize_date(ex.get('recurrence-id').dt)
-                                    if ex_recurrence_id == occ_start:
-                                        # Override with exception event
-                                        ex_summary = ex.get('summary', summary).strip()
-                                        ex_description = truncate_description(ex.get('description', description).strip())
-                                        ex_location = ex.get('location', location).strip()
-                                        # Append exception event
-                                        events.append({
-                                            'uid': uid,
-                                            'name': ex_summary,
-                                            'description': ex_description,
-                                            'start_time': occ_start.in_tz('UTC'),
-                                            'end_time': (pendulum.instance(ex.get('dtend').dt, tz=timezone)).in_tz('UTC').replace(microsecond=0, second=0),
-                                            'location': ex_location
-                                        })
-                                        break
-                                else:
-                                    # No exception matches, use original
-                                    events.append({
-                                        'uid': uid,
-                                        'name': summary,
-                                        'description': description,
-                                        'start_time': occ_start.in_tz('UTC'),
-                                        'end_time': occ_end.in_tz('UTC'),
-                                        'location': location
-                                    })
-                            else:
-                                # No exceptions, add event as is
-                                events.append({
-                                    'uid': uid,
-                                    'name': summary,
-                                    'description': description,
-                                    'start_time': occ_start.in_tz('UTC'),
-                                    'end_time': occ_end.in_tz('UTC'),
-                                    'location': location
-                                })
-                    else:
-                        # Non-recurring event
-                        if now <= end <= future:
-                            if status == 'CANCELLED':
-                                canceled_events.append({
-                                    'uid': uid,
-                                    'name': summary,
-                                    'description': description,
-                                    'start_time': start.in_tz('UTC'),
-                                    'end_time': end.in_tz('UTC'),
-                                    'location': location
-                                })
-                                continue  # Skip as it's cancelled
-
-                            events.append({
-                                'uid': uid,
-                                'name': summary,
-                                'description': description,
-                                'start_time': start.in_tz('UTC'),
-                                'end_time': end.in_tz('UTC'),
-                                'location': location
-                            })
-            except requests.RequestException as e:
-                logging.error(f"HTTP error fetching events from {url}: {e}")
-                traceback.print_exc()
-            except Exception as e:
-                logging.error(f"Error parsing events from {url}: {e}")
-                traceback.print_exc()
+        feeds = list(CALENDAR_FEEDS)
+        refreshed = {feed.url for feed in (feeds if refresh is None else refresh)}
+        loop = asyncio.get_running_loop()
+
+        results = await asyncio.gather(*(
+            asyncio.wait_for(
+                loop.run_in_executor(
+                    FEED_EXECUTOR, PROFILER.wrap(fetch_feed_occurrences), feed, now, feed.url in refreshed
+                ),
+                timeout=FEED_TIMEOUT_SECONDS
+            )
+            for feed in feeds
+        ), return_exceptions=True)
+
+        failed = []
+        for feed, result in zip(feeds, results):
+            if isinstance(result, Exception):
+                PHASE_FAILURES.inc(phase='ics_feed')
+                failed.append(feed)
+            if feed.url in refreshed:
+                # A failed refresh counts as a change, so it is retried at the feed's shortest interval
+                FEED_SCHEDULER.record(feed, now, isinstance(result, Exception) or result['changed'])
+            if isinstance(result, asyncio.TimeoutError):
+                logging.error(f"Timed out fetching events from {feed.name} after {FEED_TIMEOUT_SECONDS}s")
+            elif isinstance(result, requests.RequestException):
+                logging.error(f"HTTP error fetching events from {feed.name}: {result}")
+                traceback.print_exception(result)
+            elif isinstance(result, Exception):
+                logging.error(f"Error parsing events from {feed.name}: {result}")
+                traceback.print_exception(result)
+            else:
+                collect(result)
+
+        # A failed feed keeps its last known events, so a reconcile in this
+        # poll does not delete its Discord events as missing from the calendar
+        fallbacks = await asyncio.gather(*(
+            asyncio.wait_for(
+                loop.run_in_executor(FEED_EXECUTOR, cached_feed_occurrences, feed, now),
+                timeout=FEED_TIMEOUT_SECONDS
+            )
+            for feed in failed
+        ), return_exceptions=True)
+        for feed, result in zip(failed, fallbacks):
+            if isinstance(result, dict):
+                logging.warning(f"Using the cached copy of {feed.name} until it can be fetched again")
+                collect(result)
+            else:
+                if isinstance(result, Exception):
+                    logging.error(f"Error reading the cached copy of {feed.name}: {result}")
+                unavailable_feeds.append(feed.name)
     except Exception as e:
-        logging.error(f"Error in fetch_calendar_events: {e}")
+        logging.error(f"Error in fetch_calendar_snapshot: {e}")
         traceback.print_exc()
-    return events, canceled_events
-
-def find_matching_discord_event(discord_events, cal_event):
+        unavailable_feeds = [feed.name for feed in CALENDAR_FEEDS]
+    return {
+        'events': events,
+        'canceled_events': canceled_events,
+        'changed': changed,
+        'next_entry': min(next_entries) if next_entries else None,
+        'unavailable_feeds': unavailable_feeds,
+    }
+
+async def fetch_calendar_events():
+    """Fetch and return calendar events and canceled events within each feed's sync window."""
+    snapshot = await fetch_calendar_snapshot()
+    return snapshot['events'], snapshot['canceled_events']
+
+def calendar_event_key(cal_event):
+    """Return the (name, start_time, location) key used to match a calendar event."""
+    return (
+        cal_event['name'],
+        cal_event['start_time'],
+        cal_event.get('location', 'MAG Laboratory')
+    )
+
+def discord_event_key(event):
+    """Return the normalized (name, start_time, location) key of a Discord event."""
+    return (
+        event.name,
+        pendulum.instance(event.start_time).in_timezone('UTC').replace(microsecond=0, second=0),
+        (event.location or 'MAG Laboratory').strip()
+    )
+
+def index_discord_events(keyed_events):
+    """Index (key, event) pairs by key, skipping completed events; the first event wins per key."""
+    index = {}
+    for key, event in keyed_events:
+        # Skip events that have already ended
+        if event.status == discord.EventStatus.completed:
+            continue
+        index.setdefault(key, event)
+    return index
+
+EVENT_INDEX = ScheduledEventIndex(discord_event_key)
+
+def find_matching_discord_event(discord_event_index, cal_event):
     """Find a matching Discord event by name, start_time, and location."""
     try:
-        cal_start_time = cal_event['start_time']
-        cal_name = cal_event['name']
-        cal_location = cal_event.get('location', 'MAG Laboratory')
-
-        for event in discord_events:
-            # Skip events that have already ended
-            if event.status == discord.EventStatus.completed:
-                continue
-
-            event_start_time = pendulum.instance(event.start_time).in_timezone('UTC').replace(microsecond=0, second=0)
-            event_name = event.name
-            event_location = (event.location or 'MAG Laboratory').strip()
-
-            if (
-                event_name == cal_name and
-                event_start_time == cal_start_time and
-                event_location == cal_location
-            ):
-                return event
+        return discord_event_index.get(calendar_event_key(cal_event))
     except Exception as e:
         logging.error(f"Error finding matching event: {e}")
         traceback.print_exc()
     return None
 
-async def sync_discord_events(guild):
-    """Sync calendar events with Discord events."""
+def is_protected_event(discord_event):
+    """The bot's own 'We are OPEN/CLOSED' status event is never touched by the sync."""
+    return "We are" in discord_event.name
+
+def event_changes(discord_event, event_key, cal_event):
+    """Return the fields of a Discord event that differ from its calendar event."""
+    changes = {}
+    event_name, event_start_time, event_location = event_key
+    if event_name != cal_event['name']:
+        changes['name'] = cal_event['name']
+    # Discord refuses start time edits once an event is active
+    if event_start_time != cal_event['start_time'] and discord_event.status != discord.EventStatus.active:
+        changes['start_time'] = cal_event['start_time']
+    if event_location != cal_event['location']:
+        changes['location'] = cal_event['location']
+    if (discord_event.description or '').strip() != cal_event['description'].strip():
+        changes['description'] = cal_event['description']
+    event_end_time = discord_event.end_time and pendulum.instance(discord_event.end_time).in_timezone('UTC').replace(microsecond=0, second=0)
+    if event_end_time != cal_event['end_time'].replace(microsecond=0, second=0):
+        changes['end_time'] = cal_event['end_time']
+    return changes
+
+def plan_discord_sync(calendar_events, canceled_events, keyed_events, now, mappings=None, delete_missing=True,
+                      owned_event_ids=None):
+    """
+    Compute the minimal set of operations that brings Discord in line with the calendar.
+
+    Each operation is a dict with an 'action' of 'create', 'edit', 'delete' or
+    'noop', the 'cal_event' and/or 'discord_event' it applies to, and for edits
+    the 'changes' to send. Occurrences found in the stored mappings
+    ({(uid, start_key): (event_id, fingerprint)}) are resolved by event ID and
+    only diffed when their fingerprint changed. Others are matched exactly by
+    (name, start_time, location); the rest are paired with an unmatched Discord
+    event sharing (name, start_time), or recorded for the same calendar uid
+    (the nearest in time), and edited in place, so changed fields keep the
+    event ID and its RSVPs. A Discord event recorded for another uid is never
+    paired, so one class never takes over another's event. Without
+    delete_missing (some feed could not be read), Discord events missing from
+    the calendar are kept rather than deleted. With owned_event_ids (a guild
+    the calendar is only mirrored into), every other Discord event belongs
+    to the guild itself and is never matched, edited or deleted.
+    """
+    plan = []
+    mappings = mappings or {}
+    if owned_event_ids is not None:
+        keyed_events = [
+            (key, discord_event) for key, discord_event in keyed_events if discord_event.id in owned_event_ids
+        ]
+    discord_event_index = index_discord_events(keyed_events)
+    events_by_id = {
+        discord_event.id: (key, discord_event)
+        for key, discord_event in keyed_events
+        if discord_event.status != discord.EventStatus.completed
+    }
+    calendar_event_keys = {calendar_event_key(cal_event) for cal_event in calendar_events}
+    planned_keys = set()
+    planned_occurrences = set()
+    claimed = set()
+    unmatched = []
+
+    def mapped_event(cal_event):
+        mapping = mappings.get((cal_event['uid'], occurrence_start_key(cal_event['start_time'])))
+        if mapping and mapping[0] in events_by_id and mapping[0] not in claimed:
+            return mapping[1], events_by_id[mapping[0]]
+        return None, None
+
+    # Stored mappings and exact matches become no-ops or in-place edits
+    for cal_event in calendar_events:
+        key = calendar_event_key(cal_event)
+        occurrence = (cal_event['uid'], occurrence_start_key(cal_event['start_time']))
+        if occurrence in planned_occurrences:
+            continue  # Same occurrence listed twice; plan it once
+        planned_occurrences.add(occurrence)
+
+        fingerprint, mapped = mapped_event(cal_event)
+        if mapped:
+            event_key, discord_event = mapped
+            claimed.add(discord_event.id)
+            planned_keys.add(key)
+            fingerprint_current = fingerprint == event_fingerprint(cal_event)
+            changes = {} if fingerprint_current else event_changes(discord_event, event_key, cal_event)
+            plan.append({
+                'action': 'edit' if changes else 'noop',
+                'cal_event': cal_event,
+                'discord_event': discord_event,
+                'changes': changes,
+                'fingerprint_current': fingerprint_current,
+            })
+            continue
+
+        if key in planned_keys:
+            continue  # Another occurrence already claimed this exact event
+        planned_keys.add(key)
+
+        discord_event = find_matching_discord_event(discord_event_index, cal_event)
+        if discord_event is None or discord_event.id in claimed:
+            unmatched.append(cal_event)
+            continue
+        claimed.add(discord_event.id)
+        changes = event_changes(discord_event, key, cal_event)
+        plan.append({
+            'action': 'edit' if changes else 'noop',
+            'cal_event': cal_event,
+            'discord_event': discord_event,
+            'changes': changes,
+        })
+
+    # Remove canceled events
+    for cal_event in canceled_events:
+        _, mapped = mapped_event(cal_event)
+        discord_event = mapped[1] if mapped else find_matching_discord_event(discord_event_index, cal_event)
+        if discord_event and discord_event.id not in claimed:
+            claimed.add(discord_event.id)
+            plan.append({
+                'action': 'delete',
+                'cal_event': cal_event,
+                'discord_event': discord_event,
+                'reason': 'canceled',
+            })
+
+    # Pair the remaining calendar events with upcoming Discord events of the
+    # same name and start, or recorded for the same calendar uid
+    recorded_uids = {event_id: uid for (uid, _), (event_id, _) in mappings.items()}
+    candidates = {}
+    for key, discord_event in keyed_events:
+        if (
+            discord_event.id in claimed or
+            key in calendar_event_keys or
+            discord_event.status != discord.EventStatus.scheduled or
+            is_protected_event(discord_event)
+        ):
+            continue
+        event_name, event_start_time, _ = key
+        candidates.setdefault(('name', event_name, event_start_time), []).append((key, discord_event))
+        if discord_event.id in recorded_uids:
+            candidates.setdefault(('uid', recorded_uids[discord_event.id]), []).append((key, discord_event))
+
+    for cal_event in unmatched:
+        name, start_time, _ = calendar_event_key(cal_event)
+        uid = cal_event['uid']
+        match = None
+        for lookup in (('name', name, start_time), ('uid', uid)):
+            pairable = [
+                (key, discord_event) for key, discord_event in candidates.get(lookup, [])
+                if discord_event.id not in claimed and recorded_uids.get(discord_event.id, uid) == uid
+            ]
+            if pairable:
+                match = min(pairable, key=lambda candidate: abs((candidate[0][1] - start_time).total_seconds()))
+                break
+
+        if match:
+            key, discord_event = match
+            claimed.add(discord_event.id)
+            plan.append({
+                'action': 'edit',
+                'cal_event': cal_event,
+                'discord_event': discord_event,
+                'changes': event_changes(discord_event, key, cal_event),
+            })
+        else:
+            plan.append({'action': 'create', 'cal_event': cal_event})
+
+    # Remove events not in the calendar and not currently occurring
+    for key, discord_event in keyed_events if delete_missing else ():
+        if discord_event.id in claimed or key in calendar_event_keys or is_protected_event(discord_event):
+            continue
+        try:
+            event_start_time = pendulum.instance(discord_event.start_time).in_timezone('UTC')
+            event_end_time = pendulum.instance(discord_event.end_time).in_timezone('UTC')
+            if event_start_time <= now <= event_end_time:
+                continue  # Do not delete ongoing events
+        except Exception as e:
+            logging.error(f"Error processing event '{discord_event.name}': {e}")
+            traceback.print_exc()
+            continue
+        plan.append({
+            'action': 'delete',
+            'discord_event': discord_event,
+            'reason': 'not found in calendar',
+        })
+
+    return plan
+
+def describe_operation(operation):
+    """Return a one-line, human readable description of a planned operation."""
+    action = operation['action']
+    if 'cal_event' in operation:
+        name = operation['cal_event']['name']
+        start_time = operation['cal_event']['start_time']
+    else:
+        name = operation['discord_event'].name
+        start_time = pendulum.instance(operation['discord_event'].start_time)
+    la_time = start_time.in_tz(LA_TZ).to_datetime_string()
+
+    if action == 'create':
+        return f"Creating event '{name}' at {la_time}"
+    if action == 'edit':
+        fields = ', '.join(sorted(operation['changes']))
+        return f"Updating event '{operation['discord_event'].name}' at {la_time} ({fields})"
+    if action == 'delete':
+        if operation['reason'] == 'canceled':
+            return f"Removing canceled event '{name}' scheduled at {la_time}"
+        return f"Removing event '{name}' scheduled at {la_time} {operation['reason']}"
+    return f"Exact duplicate found for '{name}' (Start Time: {la_time}). No new event created."
+
+async def apply_operation(guild, operation, store=None):
+    """Apply one planned operation through WRITE_QUEUE and record it in the store."""
+    action = operation['action']
+    logging.info(describe_operation(operation))
     try:
-        existing_events = await guild.fetch_scheduled_events()
-        calendar_events, canceled_events = fetch_calendar_events()
-
-        # Create a set of event keys from calendar events for easy lookup
-        calendar_event_keys = set()
-        for cal_event in calendar_events:
-            key = (
-                cal_event['name'],
-                cal_event['start_time'],
-                cal_event.get('location', 'MAG Laboratory')
+        if action == 'create':
+            cal_event = operation['cal_event']
+            discord_event = await WRITE_QUEUE.create(
+                guild,
+                name=cal_event['name'],
+                description=cal_event['description'],
+                start_time=cal_event['start_time'],
+                end_time=cal_event['end_time'],
+                entity_type=discord.EntityType.external,
+                location=cal_event['location'],
+                privacy_level=discord.PrivacyLevel.guild_only
             )
-            calendar_event_keys.add(key)
-
-        # Create or update events
-        for cal_event in calendar_events:
-            discord_event = find_matching_discord_event(existing_events, cal_event)
-            start_time = cal_event['start_time']
-            la_time = start_time.in_tz(LA_TZ).to_datetime_string()
-
-            try:
-                if discord_event:
-                    # Exact duplicate found; log and do not create a new event
-                    logging.info(
-                        f"Exact duplicate found for '{cal_event['name']}' (Start Time: {la_time}). No new event created."
-                    )
-                    continue  # Skip creating a new event
-                else:
-                    # Create new event
-                    logging.info(
-                        f"Creating event '{cal_event['name']}' at {la_time}"
-                    )
-                    await guild.create_scheduled_event(
-                        name=cal_event['name'],
-                        description=cal_event['description'],
-                        start_time=start_time,
-                        end_time=cal_event['end_time'],
-                        entity_type=discord.EntityType.external,
-                        location=cal_event['location'],
-                        privacy_level=discord.PrivacyLevel.guild_only
-                    )
-            except Exception as e:
-                logging.error(f"Error syncing event '{cal_event['name']}': {e}")
-                traceback.print_exc()
-
-        # Remove canceled events
-        for cal_event in canceled_events:
-            discord_event = find_matching_discord_event(existing_events, cal_event)
-            if discord_event:
-                start_time = cal_event['start_time']
-                la_time = start_time.in_tz(LA_TZ).to_datetime_string()
-                try:
-                    logging.info(
-                        f"Removing canceled event '{cal_event['name']}' scheduled at {la_time}"
-                    )
-                    await discord_event.delete()
-                except Exception as e:
-                    logging.error(f"Error deleting event '{cal_event['name']}': {e}")
-                    traceback.print_exc()
-
-        # Remove events not in the calendar and not currently occurring
-        now = pendulum.now('UTC')
-        for discord_event in existing_events:
-            try:
-                # Skip events that are currently occurring
-                event_start_time = pendulum.instance(discord_event.start_time).in_timezone('UTC')
-                event_end_time = pendulum.instance(discord_event.end_time).in_timezone('UTC')
-
-                if event_start_time <= now <= event_end_time:
-                    continue  # Do not delete ongoing events
-
-                event_name = discord_event.name
-                event_location = (discord_event.location or 'MAG Laboratory').strip()
-                event_key = (
-                    event_name,
-                    event_start_time.replace(microsecond=0, second=0),
-                    event_location
-                )
-                if event_key not in calendar_event_keys and "We are" not in event_name:
-                    la_event_time = event_start_time.in_tz(LA_TZ).to_datetime_string()
-                    logging.info(
-                        f"Removing event '{event_name}' scheduled at {la_event_time} not found in calendar"
-                    )
-                    try:
-                        await discord_event.delete()
-                    except discord.errors.HTTPException as e:
-                        logging.error(f"Error deleting event '{event_name}': {e}")
-                        traceback.print_exc()
-            except Exception as e:
-                logging.error(f"Error processing event '{discord_event.name}': {e}")
-                traceback.print_exc()
+            EVENT_INDEX.upsert(discord_event)
+            note_own_write(discord_event)
+            if store:
+                store.record(guild.id, cal_event, discord_event.id)
+        elif action == 'delete':
+            note_own_write(operation['discord_event'])
+            await WRITE_QUEUE.delete(operation['discord_event'])
+            EVENT_INDEX.remove(operation['discord_event'])
+            if store:
+                store.forget(guild.id, operation['discord_event'].id)
+        else:
+            if action == 'edit':
+                note_own_write(operation['discord_event'])
+                edited_event = await WRITE_QUEUE.edit(operation['discord_event'], **operation['changes'])
+                if edited_event is not None:
+                    EVENT_INDEX.upsert(edited_event)
+            if store and not operation.get('fingerprint_current'):
+                store.record(guild.id, operation['cal_event'], operation['discord_event'].id)
     except Exception as e:
-        logging.error(f"Error in sync_discord_events: {e}")
+        name = operation['cal_event']['name'] if 'cal_event' in operation else operation['discord_event'].name
+        logging.error(f"Error applying {action} for event '{name}': {e}")
         traceback.print_exc()
 
-@tasks.loop(hours=1)
-async def sync_events_task():
-    """Sync events every hour, ensuring recovery from errors."""
+async def execute_sync_plan(guild, plan, store=None):
+    """Apply the create/edit/delete operations of a sync plan concurrently through WRITE_QUEUE."""
+    await asyncio.gather(*(apply_operation(guild, operation, store) for operation in plan))
+
+def log_plan_summary(plan, dry_run=False, guild_id=GUILD_ID):
+    """Log how many operations of each kind a guild's plan contains."""
+    counts = {action: 0 for action in ('create', 'edit', 'delete', 'noop')}
+    for operation in plan:
+        counts[operation['action']] += 1
+    prefix = "[dry run] " if dry_run else ""
+    logging.info(
+        f"{prefix}Sync plan for guild {guild_id}: {counts['create']} create, {counts['edit']} edit, "
+        f"{counts['delete']} delete, {counts['noop']} unchanged"
+    )
+
+async def sync_discord_events(guild, dry_run=False, snapshot=None):
+    """Sync calendar events with Discord events; with dry_run, only print the plan."""
+    async with SYNC_LOCKS.setdefault(guild.id, asyncio.Lock()):
+        return await _sync_discord_events(guild, dry_run, snapshot)
+
+async def _sync_discord_events(guild, dry_run, snapshot):
     try:
-        guild = discord.utils.get(client.guilds, id=GUILD_ID)
+        if snapshot is None:
+            snapshot = await fetch_calendar_snapshot()
+        calendar_events = snapshot['events']
+        canceled_events = snapshot['canceled_events']
+
+        # Discord events come keyed from the gateway-maintained index; a full
+        # REST listing only seeds it and periodically checks it for drift
+        if EVENT_INDEX.needs_refresh(guild.id):
+            EVENT_INDEX.replace(guild.id, await guild.fetch_scheduled_events())
+        keyed_events = EVENT_INDEX.keyed_events(guild.id)
+
+        if not dry_run:
+            EVENT_STORE.prune(guild.id, {discord_event.id for _, discord_event in keyed_events})
+        mappings = EVENT_STORE.load(guild.id)
+
+        unavailable_feeds = snapshot.get('unavailable_feeds')
+        if unavailable_feeds:
+            logging.warning(
+                f"No events from {', '.join(unavailable_feeds)}; "
+                f"keeping Discord events that are missing from the calendar"
+            )
+        # Outside the home guild, only the events this bot created (and recorded) are its own
+        owned_event_ids = None if guild.id == GUILD_ID else {event_id for event_id, _ in mappings.values()}
+        with timed('sync_match'):
+            plan = plan_discord_sync(
+                calendar_events, canceled_events, keyed_events, pendulum.now('UTC'), mappings,
+                delete_missing=not unavailable_feeds, owned_event_ids=owned_event_ids
+            )
+        log_plan_summary(plan, dry_run, guild.id)
+        if dry_run:
+            for operation in plan:
+                print(f"[dry run] guild {guild.id}: {describe_operation(operation)}")
+            return plan
+
+        with timed('sync_apply'):
+            await execute_sync_plan(guild, plan, EVENT_STORE)
+        return plan
+    except Exception as e:
+        PHASE_FAILURES.inc(phase='guild_sync')
+        logging.error(f"Error in sync_discord_events for guild {guild.id}: {e}")
+        traceback.print_exc()
+
+def sync_guilds():
+    """The configured guilds the bot is in; logs the ones it cannot see."""
+    guilds = []
+    for guild_id in SYNC_GUILD_IDS:
+        guild = client.get_guild(guild_id)
         if guild:
-            await sync_discord_events(guild)
+            guilds.append(guild)
         else:
-            logging.info("Guild not found!")
+            logging.info(f"Guild {guild_id} not found!")
+    return guilds
+
+async def sync_all_guilds(guilds, snapshot, dry_run=False):
+    """
+    Reconcile one calendar snapshot into every guild concurrently.
+
+    The feeds are fetched and expanded once; each guild only adds its own
+    Discord listing and writes. Guilds have their own sync lock and write
+    queue, and an error in one guild is logged without affecting the others.
+    """
+    results = await asyncio.gather(*(
+        sync_discord_events(guild, dry_run=dry_run, snapshot=snapshot) for guild in guilds
+    ), return_exceptions=True)
+    for guild, result in zip(guilds, results):
+        if isinstance(result, BaseException):
+            PHASE_FAILURES.inc(phase='guild_sync')
+            logging.error(f"Error syncing guild {guild.id}: {result}")
+            traceback.print_exception(result)
+
+def next_occurrence_start(calendar_events, now):
+    """Return the earliest start among calendar events that have not started yet."""
+    upcoming = [cal_event['start_time'] for cal_event in calendar_events if cal_event['start_time'] > now]
+    return min(upcoming) if upcoming else None
+
+@tasks.loop(seconds=SYNC_SCHEDULE.min_interval)
+async def sync_events_task():
+    """
+    Poll the feeds cheaply and reconcile only when something changed.
+
+    The loop interval is adjusted after every poll by SYNC_SCHEDULE: short
+    while feeds are changing, backing off during quiet periods, and woken for
+    upcoming occurrence boundaries.
+    """
+    async with PROFILER.iteration():
+        await poll_and_reconcile()
+
+async def poll_and_reconcile():
+    """One poll of the feeds, followed by a reconcile when one is due."""
+    try:
+        guilds = sync_guilds()
+        if not guilds:
+            return
+
+        due = FEED_SCHEDULER.due(CALENDAR_FEEDS, pendulum.now('UTC'))
+        with timed('calendar_poll'):
+            snapshot = await fetch_calendar_snapshot(refresh=due)
+        now = pendulum.now('UTC')
+        reconcile = SYNC_SCHEDULE.reconcile_due(now, snapshot['changed'])
+        if reconcile:
+            with timed('calendar_reconcile'):
+                await sync_all_guilds(guilds, snapshot)
+        delay = SYNC_SCHEDULE.record(
+            now, snapshot['changed'], reconcile,
+            next_entry=snapshot['next_entry'],
+            next_start=next_occurrence_start(snapshot['events'], now)
+        )
+        until_due = FEED_SCHEDULER.seconds_until_next(CALENDAR_FEEDS, now)
+        if until_due is not None:
+            delay = min(delay, max(SYNC_SCHEDULE.min_wake, until_due))
+        logging.debug(f"Next calendar poll in {delay:.0f}s (reconciled: {reconcile})")
+        sync_events_task.change_interval(seconds=delay)
     except Exception as e:
         logging.error(f"Error in sync_events_task: {e}")
         traceback.print_exc()
@@ -385,30 +876,97 @@ async def sync_events_task_error(error):
     logging.error(f"Error in sync_events_task: {error}")
     traceback.print_exc()
 
-@client.event
+@client.listen()
 async def on_ready():
     """Start syncing once the bot is ready."""
+    global SYNC_GUILD_IDS, CALENDAR_FEEDS
+    if not loop_enabled(CALENDAR_LOOP):
+        return
     logging.info(f'Logged in as {client.user}')
+    # A new gateway session does not replay the scheduled event changes
+    # missed while disconnected; re-list every guild on its next sync
+    EVENT_INDEX.mark_stale()
+    config = load_bot_config()
+    SYNC_GUILD_IDS = [int(guild_id) for guild_id in config.get(CALENDAR_GUILDS) or [GUILD_ID]]
+    CALENDAR_FEEDS = load_calendars(config.get(CALENDARS))
+    logging.info(f"Syncing {len(CALENDAR_FEEDS)} calendar(s) into {len(SYNC_GUILD_IDS)} guild(s)")
+    if DRY_RUN:
+        guilds = sync_guilds()
+        if guilds:
+            await sync_all_guilds(guilds, await fetch_calendar_snapshot(), dry_run=True)
+        await client.close()
+        return
     if not sync_events_task.is_running():
         sync_events_task.start()
     else:
         logging.info("sync_events_task is already running.")
 
-@client.event
+def note_own_write(discord_event):
+    """Remember that this bot just wrote to an event, so its gateway echo is ignored."""
+    now = time.monotonic()
+    for event_id, written_at in list(RECENT_WRITES.items()):
+        if now - written_at >= OWN_WRITE_GRACE_SECONDS:
+            del RECENT_WRITES[event_id]
+    RECENT_WRITES[discord_event.id] = now
+
+def is_own_write(discord_event):
+    written_at = RECENT_WRITES.get(discord_event.id)
+    return written_at is not None and time.monotonic() - written_at < OWN_WRITE_GRACE_SECONDS
+
+async def resync_after_manual_change(guild_id):
+    """Re-sync shortly after a manual edit, so calendar-owned events are restored quickly."""
+    await asyncio.sleep(RESYNC_DELAY_SECONDS)
+    RESYNC_TASKS.pop(guild_id, None)
+    guild = client.get_guild(guild_id)
+    if guild:
+        logging.info(f"Re-syncing guild {guild_id} after a manual scheduled event change")
+        # Only Discord changed; the feeds are served from the cache
+        await sync_discord_events(guild, snapshot=await fetch_calendar_snapshot(refresh=()))
+
+def schedule_resync(discord_event):
+    """Debounce a re-sync of the event's guild for manual edits or deletions of synced events."""
+    if discord_event.guild_id not in SYNC_GUILD_IDS or is_protected_event(discord_event) or is_own_write(discord_event):
+        return
+    # The stored fingerprint only describes what the calendar last pushed;
+    # clear it so the re-sync diffs the manually edited event and restores it
+    EVENT_STORE.invalidate(discord_event.guild_id, discord_event.id)
+    if discord_event.guild_id not in RESYNC_TASKS:
+        RESYNC_TASKS[discord_event.guild_id] = asyncio.create_task(
+            resync_after_manual_change(discord_event.guild_id)
+        )
+
+@client.listen()
+async def on_scheduled_event_create(event):
+    if loop_enabled(CALENDAR_LOOP):
+        EVENT_INDEX.upsert(event)
+
+@client.listen()
+async def on_scheduled_event_update(before, after):
+    if not loop_enabled(CALENDAR_LOOP):
+        return
+    EVENT_INDEX.upsert(after)
+    if (
+        discord_event_key(before) != discord_event_key(after) or
+        before.description != after.description or
+        before.end_time != after.end_time
+    ):
+        schedule_resync(after)
+
+@client.listen()
+async def on_scheduled_event_delete(event):
+    if not loop_enabled(CALENDAR_LOOP):
+        return
+    EVENT_INDEX.remove(event)
+    schedule_resync(event)
+
+@client.listen()
 async def on_disconnect():
     logging.warning("Bot disconnected!")
 
-@client.event
+@client.listen()
 async def on_resumed():
     logging.info("Bot resumed connection!")
 
-@client.event
-async def on_error(event, *args, **kwargs):
-    logging.error(f"Error in event '{event}':")
-    traceback.print_exc()
-
-try:
-    client.run(DISCORD_TOKEN)
-except Exception as e:
-    logging.error(f"Error running Discord client: {e}")
-    traceback.print_exc()
+# Run only the calendar sync; run_maglab_bots.py hosts it together with the status loop
+if __name__ == '__main__':
+    run_bot([CALENDAR_LOOP])
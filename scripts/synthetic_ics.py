@@ -0,0 +1,122 @@
+"""
+Generate synthetic ICS feeds shaped like a busy Google Calendar export.
+
+The feed holds one-off events spread over a long history, recurring series
+with old DTSTARTs and dense RRULEs, many RECURRENCE-ID overrides and
+cancelled occurrences (historical and upcoming), and fully cancelled events.
+Output is deterministic for a given seed.
+
+Usage:
+    python synthetic_ics.py out.ics [--one-offs N] [--series N] [--overrides N] [--seed N]
+"""
+import random
+import argparse
+from datetime import datetime, timedelta
+
+import pendulum
+
+TZID = 'America/Los_Angeles'
+
+# (RRULE, period between occurrences): simple rules so override RECURRENCE-IDs
+# can be placed on real occurrences by adding whole periods to DTSTART
+RULES = [
+    ('FREQ=DAILY', timedelta(days=1)),
+    ('FREQ=WEEKLY', timedelta(weeks=1)),
+    ('FREQ=WEEKLY;INTERVAL=2', timedelta(weeks=2)),
+    ('FREQ=DAILY;INTERVAL=3', timedelta(days=3)),
+]
+
+LOCATIONS = ['MAG Laboratory', 'Main Room', 'Electronics Bench', 'Wood Shop', '']
+
+
+def _local(dt):
+    return dt.strftime('%Y%m%dT%H%M%S')
+
+
+def _vevent(uid, start, end, summary, description, location,
+            rrule=None, recurrence_id=None, status=None):
+    lines = ['BEGIN:VEVENT', f'UID:{uid}']
+    if recurrence_id is not None:
+        lines.append(f'RECURRENCE-ID;TZID={TZID}:{_local(recurrence_id)}')
+    lines += [
+        f'DTSTART;TZID={TZID}:{_local(start)}',
+        f'DTEND;TZID={TZID}:{_local(end)}',
+    ]
+    if rrule:
+        lines.append(f'RRULE:{rrule}')
+    if status:
+        lines.append(f'STATUS:{status}')
+    lines += [f'SUMMARY:{summary}', f'DESCRIPTION:{description}']
+    if location:
+        lines.append(f'LOCATION:{location}')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def generate_ics(one_offs=1000, series=150, overrides_per_series=10, history_days=5 * 365,
+                 future_days=60, now=None, seed=0):
+    """Return a synthetic ICS feed as bytes."""
+    rng = random.Random(seed)
+    now = (now or pendulum.now(TZID)).in_tz(TZID)
+    now = datetime(now.year, now.month, now.day, now.hour)  # Naive local wall time
+    description = '<p>Bring your own project.</p> &amp; snacks ' * 4
+    lines = ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//maglab//synthetic//EN']
+
+    for i in range(one_offs):
+        start = now + timedelta(hours=rng.randint(-history_days * 24, future_days * 24))
+        end = start + timedelta(hours=rng.choice([1, 2, 3]))
+        status = 'CANCELLED' if rng.random() < 0.05 else None
+        lines += _vevent(f'oneoff-{i}@synthetic', start, end, f'Workshop {i}', description,
+                         rng.choice(LOCATIONS), status=status)
+
+    for i in range(series):
+        rule, period = rng.choice(RULES)
+        if rng.random() < 0.1:
+            rule += f';COUNT={rng.randint(50, 2000)}'
+        elif rng.random() < 0.1:
+            until = now + timedelta(days=rng.randint(-history_days, future_days))
+            rule += f";UNTIL={pendulum.instance(until, tz=TZID).in_tz('UTC').strftime('%Y%m%dT%H%M%SZ')}"
+        start = (now - timedelta(days=rng.randint(30, history_days))).replace(hour=rng.randint(10, 20))
+        end = start + timedelta(hours=rng.choice([1, 2, 3]))
+        uid = f'series-{i}@synthetic'
+        status = 'CANCELLED' if rng.random() < 0.02 else None
+        lines += _vevent(uid, start, end, f'Meetup {i}', description, rng.choice(LOCATIONS),
+                         rrule=rule, status=status)
+
+        # Overrides and cancellations, most in the past as in real exports,
+        # a few in the upcoming window
+        past_periods = (now - start) // period
+        upcoming = range(past_periods + 1, past_periods + 1 + timedelta(days=future_days) // period)
+        picks = set(rng.sample(range(1, past_periods + 1), min(overrides_per_series, past_periods)))
+        picks.update(rng.sample(upcoming, min(2, len(upcoming), overrides_per_series)))
+        for k in sorted(picks):
+            occurrence = start + k * period
+            if rng.random() < 0.3:
+                lines += _vevent(uid, occurrence, occurrence + (end - start), f'Meetup {i}',
+                                 description, '', recurrence_id=occurrence, status='CANCELLED')
+            else:
+                moved = occurrence + timedelta(hours=rng.choice([0, 0, 1]))
+                lines += _vevent(uid, moved, moved + timedelta(hours=2), f'Meetup {i} (special)',
+                                 description + ' Special edition.', rng.choice(LOCATIONS),
+                                 recurrence_id=occurrence)
+
+    lines.append('END:VCALENDAR')
+    return ('\r\n'.join(lines) + '\r\n').encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('output')
+    parser.add_argument('--one-offs', type=int, default=1000)
+    parser.add_argument('--series', type=int, default=150)
+    parser.add_argument('--overrides', type=int, default=10, help='overrides/cancellations per series')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    content = generate_ics(args.one_offs, args.series, args.overrides, seed=args.seed)
+    with open(args.output, 'wb') as output:
+        output.write(content)
+    print(f"Wrote {args.output} ({len(content) / 1024:.0f} KiB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# Discord caps scheduled event descriptions at 1000 characters
+DISCORD_EVENT_DESCRIPTION_LIMIT = 1000
+
+
+def column_width(header, values):
+    """Width of a column: its widest cell, header included."""
+    return max([len(header)] + [len(value) for value in values])
+
+
+def format_table(rows, columns=None):
+    """
+    Render a list of dicts as a fixed-width text table.
+
+    The layout matches pandas' DataFrame.to_string(index=False): every cell,
+    header included, is right-aligned to its column's width and columns are
+    separated by a single space. Missing cells render empty.
+    """
+    if columns is None:
+        columns = list(rows[0]) if rows else []
+    if not columns:
+        return ''
+
+    cells = [[str(row.get(column, '')) for column in columns] for row in rows]
+    widths = [
+        column_width(column, [row[i] for row in cells])
+        for i, column in enumerate(columns)
+    ]
+    lines = [' '.join(column.rjust(width) for column, width in zip(columns, widths))]
+    lines.extend(' '.join(cell.rjust(width) for cell, width in zip(row, widths)) for row in cells)
+    return '\n'.join(lines)
+
+
+def format_table_within(rows, budget, columns=None):
+    """
+    Render as many rows as fit in budget characters.
+
+    Rows are dropped from the end and replaced by a '... N more' line, so the
+    header and the first rows always survive and the result never exceeds the
+    budget (unless even the header alone does not fit). Column widths are
+    computed from the rows that are actually shown.
+    """
+    table = format_table(rows, columns)
+    if len(table) <= budget:
+        return table
+
+    for shown in range(len(rows) - 1, -1, -1):
+        table = format_table(rows[:shown], columns or (list(rows[0]) if rows else None))
+        table += f"\n... {len(rows) - shown} more"
+        if len(table) <= budget:
+            return table
+    return table[:budget]
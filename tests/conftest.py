@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+# The bots are flat scripts that import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+
+
+@pytest.fixture(scope='session')
+def sync(tmp_path_factory):
+    """The calendar sync module, imported from a scratch directory so its log and mapping store stay out of the tree."""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('sync'))
+    try:
+        import sync_multiple_google_calendars_to_discord_events as module
+    finally:
+        os.chdir(cwd)
+    return module
+
+
+@pytest.fixture(scope='session')
+def status(tmp_path_factory):
+    """The lab status bot module, imported from a scratch directory; skipped where CairoSVG cannot load."""
+    cwd = os.getcwd()
+    os.chdir(tmp_path_factory.mktemp('status'))
+    try:
+        import report_maglab_open_status_on_discord_events as module
+    except (ImportError, OSError) as e:  # CairoSVG raises OSError when libcairo is missing
+        pytest.skip(f"status bot cannot be imported here: {e}")
+    finally:
+        os.chdir(cwd)
+    return module
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+
+import discord
+
+from discord_write_queue import MAX_RATELIMIT_TIMEOUT, DiscordWriteQueue
+from fake_guild import FakeGuild, _FakeResponse
+from metrics import DISCORD_RATE_LIMITED
+from shared_bot import bot
+
+
+class FlakyGuild(FakeGuild):
+    """A guild whose first creates fail with the given errors."""
+
+    def __init__(self, errors):
+        super().__init__()
+        self.errors = list(errors)
+
+    async def create_scheduled_event(self, **fields):
+        if self.errors:
+            await self.api_call('create')
+            raise self.errors.pop(0)
+        return await super().create_scheduled_event(**fields)
+
+
+def create(queue, guild):
+    async def run():
+        return await queue.create(guild, name='Class', start_time=None)
+    return asyncio.run(run())
+
+
+def test_server_errors_discord_py_already_retried_are_not_retried_again():
+    guild = FlakyGuild([discord.DiscordServerError(_FakeResponse(502, 'Bad Gateway'), 'upstream')])
+    queue = DiscordWriteQueue(base_backoff=0.001)
+
+    try:
+        create(queue, guild)
+    except discord.DiscordServerError:
+        pass
+    else:
+        raise AssertionError("the 502 should have been raised")
+    assert guild.calls['create'] == 1
+
+
+def test_long_rate_limit_pauses_the_route_and_is_retried():
+    guild = FlakyGuild([discord.RateLimited(0.05)])
+    queue = DiscordWriteQueue(base_backoff=0.001)
+    before = DISCORD_RATE_LIMITED._values.get(('create',), 0)
+
+    event = create(queue, guild)
+
+    assert event.name == 'Class' and guild.calls['create'] == 2
+    assert queue.stats['rate_limited'] == 1
+    assert DISCORD_RATE_LIMITED._values[('create',)] == before + 1
+
+
+def test_bot_raises_long_rate_limits_to_the_queue():
+    assert bot.http.max_ratelimit_timeout == MAX_RATELIMIT_TIMEOUT
+
+
+def test_rate_limits_discord_py_waits_out_are_counted_from_its_log(caplog):
+    before = dict(DISCORD_RATE_LIMITED._values)
+    fmt = 'We are being rate limited. %s %s responded with 429. Retrying in %.2f seconds.'
+    url = 'https://discord.com/api/v10/guilds/1/scheduled-events/2'
+
+    with caplog.at_level(logging.WARNING, logger='discord.http'):
+        logging.getLogger('discord.http').warning(fmt, 'PATCH', url, 1.5)
+        logging.getLogger('discord.http').warning(fmt, 'POST', 'https://discord.com/api/v10/channels/1/messages', 1.5)
+
+    # Only the scheduled-event request is counted, and both are still logged
+    assert DISCORD_RATE_LIMITED._values[('edit',)] == before.get(('edit',), 0) + 1
+    assert DISCORD_RATE_LIMITED._values.get(('create',), 0) == before.get(('create',), 0)
+    assert len([record for record in caplog.records if record.name == 'discord.http']) == 2
@@ -0,0 +1,338 @@
+import re
+import logging
+
+import pendulum
+import pytest
+from dateutil.rrule import rrulestr
+from icalendar import Calendar
+
+from synthetic_ics import generate_ics
+
+NOW = pendulum.datetime(2024, 3, 4, 17, tz='UTC')  # The window crosses the DST change of March 10
+HORIZON = NOW.add(days=14)
+
+# Hand-written feed with the cases the override index must resolve like the
+# old per-occurrence scan: moved, renamed and partial overrides, overrides
+# whose RECURRENCE-ID is written in UTC, cancelled occurrences, whole-UID
+# cancellations (with stray overrides), and one-off, all-day and floating events
+FEED = b"""BEGIN:VCALENDAR
+VERSION:2.0
+PRODID:-//maglab//test//EN
+BEGIN:VEVENT
+UID:weekly@test
+DTSTART;TZID=America/Los_Angeles:20230102T190000
+DTEND;TZID=America/Los_Angeles:20230102T210000
+RRULE:FREQ=WEEKLY;BYDAY=MO,TH
+SUMMARY:Open Hack Night
+DESCRIPTION:<p>Bring a project</p> &amp; friends
+END:VEVENT
+BEGIN:VEVENT
+UID:weekly@test
+RECURRENCE-ID;TZID=America/Los_Angeles:20240307T190000
+DTSTART;TZID=America/Los_Angeles:20240307T200000
+DTEND;TZID=America/Los_Angeles:20240307T230000
+SUMMARY:Open Hack Night (late)
+DESCRIPTION:Starts an hour later
+LOCATION:Wood Shop
+END:VEVENT
+BEGIN:VEVENT
+UID:weekly@test
+RECURRENCE-ID:20240312T020000Z
+DTSTART;TZID=America/Los_Angeles:20240311T190000
+DTEND;TZID=America/Los_Angeles:20240311T200000
+SUMMARY:Open Hack Night (short)
+END:VEVENT
+BEGIN:VEVENT
+UID:weekly@test
+RECURRENCE-ID;TZID=America/Los_Angeles:20240314T190000
+DTSTART;TZID=America/Los_Angeles:20240314T190000
+DTEND;TZID=America/Los_Angeles:20240314T210000
+STATUS:CANCELLED
+SUMMARY:Open Hack Night
+END:VEVENT
+BEGIN:VEVENT
+UID:weekly@test
+RECURRENCE-ID;TZID=America/Los_Angeles:20230105T190000
+DTSTART;TZID=America/Los_Angeles:20230105T190000
+DTEND;TZID=America/Los_Angeles:20230105T220000
+SUMMARY:Open Hack Night (long ago)
+END:VEVENT
+BEGIN:VEVENT
+UID:daily@test
+DTSTART:20240301T180000Z
+DTEND:20240301T183000Z
+RRULE:FREQ=DAILY;UNTIL=20240310T180000Z
+SUMMARY:Standup
+LOCATION:Main Room
+END:VEVENT
+BEGIN:VEVENT
+UID:daily@test
+RECURRENCE-ID:20240306T180000Z
+DTSTART:20240306T180000Z
+DTEND:20240306T180000Z
+STATUS:CANCELLED
+SUMMARY:Standup
+END:VEVENT
+BEGIN:VEVENT
+UID:counted@test
+DTSTART;TZID=America/Los_Angeles:20240305T120000
+DTEND;TZID=America/Los_Angeles:20240305T130000
+RRULE:FREQ=DAILY;INTERVAL=2;COUNT=4
+SUMMARY:Class series
+END:VEVENT
+BEGIN:VEVENT
+UID:floating@test
+DTSTART:20240104T100000
+DTEND:20240104T110000
+RRULE:FREQ=WEEKLY
+SUMMARY:Floating meetup
+END:VEVENT
+BEGIN:VEVENT
+UID:floating@test
+RECURRENCE-ID:20240307T100000
+DTSTART:20240307T120000
+DTEND:20240307T130000
+SUMMARY:Floating meetup (moved)
+END:VEVENT
+BEGIN:VEVENT
+UID:dropped@test
+DTSTART;TZID=America/Los_Angeles:20230101T100000
+DTEND;TZID=America/Los_Angeles:20230101T110000
+RRULE:FREQ=DAILY
+STATUS:CANCELLED
+SUMMARY:Dropped series
+END:VEVENT
+BEGIN:VEVENT
+UID:dropped@test
+RECURRENCE-ID;TZID=America/Los_Angeles:20240306T100000
+DTSTART;TZID=America/Los_Angeles:20240306T100000
+DTEND;TZID=America/Los_Angeles:20240306T120000
+SUMMARY:Dropped series (special)
+END:VEVENT
+BEGIN:VEVENT
+UID:oneoff@test
+DTSTART:20240308T020000Z
+DTEND:20240308T040000Z
+SUMMARY:Soldering 101
+LOCATION:Electronics Bench
+END:VEVENT
+BEGIN:VEVENT
+UID:oneoff-cancelled@test
+DTSTART:20240309T020000Z
+DTEND:20240309T040000Z
+STATUS:CANCELLED
+SUMMARY:Cancelled workshop
+END:VEVENT
+BEGIN:VEVENT
+UID:oneoff-past@test
+DTSTART:20240201T020000Z
+DTEND:20240201T040000Z
+SUMMARY:Past workshop
+END:VEVENT
+BEGIN:VEVENT
+UID:allday@test
+DTSTART;VALUE=DATE:20240309
+DTEND;VALUE=DATE:20240310
+SUMMARY:Cleanup day
+END:VEVENT
+END:VCALENDAR
+""".replace(b'\n', b'\r\n')
+
+
+def baseline_expand_calendar(sync, content, now, horizon):
+    """expand_calendar as it was before overrides were indexed, kept as the reference output."""
+    normalize_date = sync.normalize_date
+    adjust_rrule_for_utc = sync.adjust_rrule_for_utc
+    truncate_description = sync.truncate_description
+    events = []
+    canceled_events = []
+    calendar = Calendar.from_ical(content)
+
+    # Dictionaries to hold exceptions and cancellations
+    exceptions = {}
+    cancellations = {}
+
+    for component in calendar.walk():
+        if component.name == "VEVENT":
+            status = str(component.get('status', '')).upper()
+            uid = str(component.get('uid'))
+            recurrence_id = component.get('recurrence-id')
+            if recurrence_id:
+                # This is an exception or cancellation of a recurring event
+                rec_id = normalize_date(recurrence_id.dt)
+                if status == 'CANCELLED':
+                    cancellations.setdefault(uid, set()).add(rec_id)
+                else:
+                    exceptions.setdefault(uid, []).append(component)
+                continue
+            elif status == 'CANCELLED':
+                # Entire event is cancelled
+                cancellations[uid] = 'ALL'
+                continue
+
+    for component in calendar.walk():
+        if component.name != "VEVENT":
+            continue  # Skip non-VEVENT components
+
+        uid = str(component.get('uid'))
+        status = str(component.get('status', '')).upper()
+
+        # Skip entirely canceled events
+        if uid in cancellations and cancellations[uid] == 'ALL':
+            continue
+
+        start = normalize_date(component.get('dtstart').dt)
+        end = normalize_date(component.get('dtend').dt)
+        timezone = start.timezone if start.timezone else pendulum.timezone('UTC')
+        start = start.in_tz(timezone)
+        end = end.in_tz(timezone)
+
+        summary = component.get('summary').strip()
+        description = truncate_description(component.get('description', 'No description provided').strip())
+        location = component.get('location', 'MAG Laboratory').strip()
+
+        if component.get('rrule'):
+            # Handle recurring events
+            rrule_str = adjust_rrule_for_utc(
+                component.get('rrule').to_ical().decode('utf-8'), start)
+            try:
+                rule = rrulestr(rrule_str, dtstart=start)
+                occurrences = rule.between(
+                    now.in_tz(timezone), horizon.in_tz(timezone))
+            except ValueError as e:
+                logging.error(f"RRULE error in {summary}: {e}")
+                continue
+            for occ in occurrences:
+                occ_start = pendulum.instance(occ, tz=timezone).replace(microsecond=0, second=0)
+                occ_end = occ_start + (end - start)
+                rec_id = occ_start
+                window_time = occ_start.in_tz('UTC')
+
+                # Check for cancellations
+                if uid in cancellations and rec_id in cancellations[uid]:
+                    canceled_events.append((window_time, {
+                        'uid': uid,
+                        'name': summary,
+                        'description': description,
+                        'start_time': occ_start.in_tz('UTC'),
+                        'end_time': occ_end.in_tz('UTC'),
+                        'location': location
+                    }))
+                    continue  # Skip this occurrence as it's cancelled
+
+                # Apply exceptions
+                if uid in exceptions:
+                    for ex in exceptions[uid]:
+                        ex_recurrence_id = normalize_date(ex.get('recurrence-id').dt)
+                        if ex_recurrence_id == occ_start:
+                            # Override with exception event
+                            ex_summary = ex.get('summary', summary).strip()
+                            ex_description = truncate_description(ex.get('description', description).strip())
+                            ex_location = ex.get('location', location).strip()
+                            # Append exception event
+                            events.append((window_time, {
+                                'uid': uid,
+                                'name': ex_summary,
+                                'description': ex_description,
+                                'start_time': occ_start.in_tz('UTC'),
+                                'end_time': (pendulum.instance(ex.get('dtend').dt, tz=timezone)).in_tz('UTC').replace(microsecond=0, second=0),
+                                'location': ex_location
+                            }))
+                            break
+                    else:
+                        # No exception matches, use original
+                        events.append((window_time, {
+                            'uid': uid,
+                            'name': summary,
+                            'description': description,
+                            'start_time': occ_start.in_tz('UTC'),
+                            'end_time': occ_end.in_tz('UTC'),
+                            'location': location
+                        }))
+                else:
+                    # No exceptions, add event as is
+                    events.append((window_time, {
+                        'uid': uid,
+                        'name': summary,
+                        'description': description,
+                        'start_time': occ_start.in_tz('UTC'),
+                        'end_time': occ_end.in_tz('UTC'),
+                        'location': location
+                    }))
+        else:
+            # Non-recurring event
+            if now <= end <= horizon:
+                window_time = end.in_tz('UTC')
+                if status == 'CANCELLED':
+                    canceled_events.append((window_time, {
+                        'uid': uid,
+                        'name': summary,
+                        'description': description,
+                        'start_time': start.in_tz('UTC'),
+                        'end_time': end.in_tz('UTC'),
+                        'location': location
+                    }))
+                    continue  # Skip as it's cancelled
+
+                events.append((window_time, {
+                    'uid': uid,
+                    'name': summary,
+                    'description': description,
+                    'start_time': start.in_tz('UTC'),
+                    'end_time': end.in_tz('UTC'),
+                    'location': location
+                }))
+    return events, canceled_events
+
+
+def assert_same_expansion(sync, content, now, horizon):
+    expected = baseline_expand_calendar(sync, content, now, horizon)
+    assert sync.expand_calendar(content, now, horizon) == expected
+    return expected
+
+
+def test_hand_written_feed_matches_baseline(sync):
+    events, canceled_events = assert_same_expansion(sync, FEED, NOW, HORIZON)
+
+    # The feed must actually exercise overrides and both kinds of cancellation
+    names = {event['name'] for _, event in events}
+    assert {'Open Hack Night (late)', 'Open Hack Night (short)', 'Floating meetup (moved)'} <= names
+    assert not any(event['uid'] == 'dropped@test' for _, event in events + canceled_events)
+    assert {(event['uid'], event['start_time']) for _, event in canceled_events} == {
+        ('weekly@test', pendulum.datetime(2024, 3, 15, 2, tz='UTC')),
+        ('daily@test', pendulum.datetime(2024, 3, 6, 18, tz='UTC')),
+    }
+
+
+def test_hand_written_feed_matches_baseline_on_a_later_window(sync):
+    # The second expansion extends series from the recurrence cache
+    assert_same_expansion(sync, FEED, NOW, HORIZON)
+    later = NOW.add(days=3, hours=5)
+    assert_same_expansion(sync, FEED, later, later.add(days=14))
+
+
+def without_uids(content, uids):
+    """The feed without any VEVENT of the given UIDs."""
+    uids = {uid.encode() for uid in uids}
+    return b''.join(
+        vevent for vevent in re.split(rb'(?=BEGIN:VEVENT\r\n)', content)
+        if not any(re.search(rb'^UID:' + re.escape(uid) + rb'\r$', vevent, re.M) for uid in uids)
+    )
+
+
+@pytest.mark.parametrize('seed', [0, 1, 3])
+def test_synthetic_feed_matches_baseline(sync, seed):
+    content = generate_ics(one_offs=300, series=40, overrides_per_series=30, now=NOW, seed=seed)
+    horizon = NOW.add(days=60)
+    calendar = Calendar.from_ical(content)
+    canceled_series = {
+        str(component.get('uid')) for component in calendar.walk('VEVENT')
+        if component.get('rrule') and str(component.get('status', '')).upper() == 'CANCELLED'
+    }
+
+    # The baseline raised on a cancelled series that also has cancelled
+    # occurrences, losing the whole feed; such a series must simply be dropped
+    expected = baseline_expand_calendar(sync, without_uids(content, canceled_series), NOW, horizon)
+    events, canceled_events = sync.expand_calendar(content, NOW, horizon)
+    assert (events, canceled_events) == expected
+    assert events and canceled_events
@@ -0,0 +1,75 @@
+import asyncio
+
+import pendulum
+import pytest
+import requests
+
+from calendar_registry import CalendarFeed, FeedScheduler
+from fake_guild import FakeGuild, FakeScheduledEvent
+from ics_feed_cache import FeedCache
+from synthetic_ics import generate_ics
+
+FEEDS = {
+    'https://example.com/main.ics': generate_ics(40, 6, 2, seed=1),
+    'https://example.com/classes.ics': generate_ics(40, 6, 2, seed=2),
+}
+
+
+class Response:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+@pytest.fixture
+def feeds(sync, monkeypatch, tmp_path):
+    """Serve FEEDS through the sync's HTTP session; returns the set of URLs that fail."""
+    failing = set()
+
+    def get(url, headers=None, timeout=None):
+        if url in failing:
+            raise requests.ConnectionError(f"{url} is down")
+        return Response(FEEDS[url])
+
+    monkeypatch.setattr(sync.SESSION, 'get', get)
+    monkeypatch.setattr(sync, 'FEED_CACHE', FeedCache(str(tmp_path / 'ics_cache')))
+    monkeypatch.setattr(sync, 'FEED_SCHEDULER', FeedScheduler())
+    monkeypatch.setattr(sync, 'CALENDAR_FEEDS', [CalendarFeed(url) for url in FEEDS])
+    return failing
+
+
+def snapshot_keys(snapshot):
+    return sorted((event['uid'], event['start_time']) for event in snapshot['events'])
+
+
+def test_failed_refresh_serves_cached_copy(sync, feeds):
+    first = asyncio.run(sync.fetch_calendar_snapshot())
+    assert first['events'] and first['unavailable_feeds'] == []
+
+    feeds.add('https://example.com/classes.ics')
+    second = asyncio.run(sync.fetch_calendar_snapshot())
+    assert second['unavailable_feeds'] == []
+    assert snapshot_keys(second) == snapshot_keys(first)
+
+
+def test_failed_feed_without_cache_is_unavailable(sync, feeds):
+    feeds.add('https://example.com/classes.ics')
+    snapshot = asyncio.run(sync.fetch_calendar_snapshot())
+    assert snapshot['unavailable_feeds'] == ['https://example.com/classes.ics']
+    assert snapshot['events']  # The other feed is still synced
+
+
+def test_missing_events_kept_while_a_feed_is_unavailable(sync):
+    now = pendulum.now('UTC')
+    start = now.add(days=1).replace(second=0, microsecond=0)
+    orphan = FakeScheduledEvent(FakeGuild(), 1, 'Class', '', start, start.add(hours=1), 'MAG Laboratory')
+    keyed_events = [(sync.discord_event_key(orphan), orphan)]
+
+    plan = sync.plan_discord_sync([], [], keyed_events, now)
+    assert [operation['action'] for operation in plan] == ['delete']
+    assert sync.plan_discord_sync([], [], keyed_events, now, delete_missing=False) == []
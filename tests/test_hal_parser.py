@@ -0,0 +1,38 @@
+import logging
+
+import hal_parser
+
+PAGE = b"""<html><body>
+<div id="lab-status">We are OPEN</div>
+<table>
+<tr><td>Front Door</td><td>closed</td><td>locked</td><td>2 min ago</td></tr>
+<tr><td>Page Loaded</td><td></td><td></td><td>now</td></tr>
+</table>
+<svg id="maglab-synoptic-view"><rect width="10" height="10"/></svg>
+</body></html>"""
+
+
+def test_html_parser_fallback_warns_once(monkeypatch, caplog):
+    monkeypatch.setattr(hal_parser, 'lxml_html', None)
+    monkeypatch.setattr(hal_parser, '_fallback_warned', False)
+
+    with caplog.at_level(logging.WARNING):
+        first = hal_parser.parse_hal_page(PAGE)
+        hal_parser.parse_hal_page(PAGE)
+
+    assert [record.getMessage() for record in caplog.records] == [
+        "lxml is not installed; parsing the HAL page with the slower html.parser fallback"
+    ]
+    assert first.lab_status == "We are OPEN"
+    assert first.sensors == [hal_parser.SensorReading('Front Door', 'closed', 'locked', '2 min ago')]
+    assert first.svg.startswith('<svg id="maglab-synoptic-view"')
+
+
+def test_lxml_backend_does_not_warn(monkeypatch, caplog):
+    monkeypatch.setattr(hal_parser, '_fallback_warned', False)
+
+    with caplog.at_level(logging.WARNING):
+        result = hal_parser.parse_hal_page(PAGE)
+
+    assert not caplog.records
+    assert result.lab_status == "We are OPEN"
@@ -0,0 +1,31 @@
+import pstats
+import asyncio
+import logging
+
+from loop_profiler import LoopProfiler
+
+
+def squares(n):
+    return sum(i * i for i in range(n))
+
+
+def test_wrapped_worker_call_is_profiled_inside_an_iteration(tmp_path, caplog):
+    profiler = LoopProfiler('test', slowest=1, directory=str(tmp_path))
+
+    async def iteration():
+        async with profiler.iteration():
+            return await asyncio.to_thread(profiler.wrap(squares), 100_000)
+
+    with caplog.at_level(logging.INFO):
+        result = asyncio.run(iteration())
+
+    assert result == squares(100_000)
+    assert "Error saving" not in caplog.text
+    [saved] = tmp_path.glob('test-*.prof')
+    assert any(function == 'squares' for _, _, function in pstats.Stats(str(saved)).stats)
+
+
+def test_wrap_outside_an_iteration_just_calls(tmp_path):
+    profiler = LoopProfiler('test', slowest=1, directory=str(tmp_path))
+    assert profiler.wrap(squares)(10) == squares(10)
+    assert not list(tmp_path.iterdir())
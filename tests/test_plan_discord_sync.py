@@ -0,0 +1,148 @@
+import asyncio
+
+import pendulum
+
+from event_mapping_store import event_fingerprint, occurrence_start_key
+from fake_guild import FakeGuild, FakeScheduledEvent
+
+NOW = pendulum.datetime(2026, 10, 17, 12, tz='UTC')
+START = NOW.add(days=1).replace(hour=2)  # 7pm Pacific
+
+
+def cal_event(uid, name, start=START, location='MAG Laboratory'):
+    return {
+        'uid': uid,
+        'name': name,
+        'description': f"{name} at the lab",
+        'start_time': start,
+        'end_time': start.add(hours=2),
+        'location': location,
+    }
+
+
+def discord_event(guild, event_id, name, start=START, location='MAG Laboratory', description=None):
+    return FakeScheduledEvent(
+        guild, event_id, name, description or f"{name} at the lab", start, start.add(hours=2), location
+    )
+
+
+def mapping(event, discord_id):
+    return {(event['uid'], occurrence_start_key(event['start_time'])): (discord_id, event_fingerprint(event))}
+
+
+def actions(plan):
+    return sorted(
+        (operation['action'], operation['discord_event'].id if 'discord_event' in operation else None)
+        for operation in plan
+    )
+
+
+def test_partner_guild_events_the_bot_did_not_create_are_left_alone(sync):
+    guild = FakeGuild(guild_id=2)
+    woodshop = cal_event('woodshop@cal', 'Woodshop 101')
+    laser = cal_event('laser@cal', 'Laser Class', start=START.add(days=1))
+    dropped = cal_event('dropped@cal', 'Dropped Class', start=START.add(days=2))
+
+    ours = discord_event(guild, 1, 'Woodshop 101')
+    ours_dropped = discord_event(guild, 2, 'Dropped Class', start=START.add(days=2))
+    # The partner guild's own events: one shares the start and location of a
+    # calendar event, one even has its exact name, one is not in the calendar
+    their_meetup = discord_event(guild, 10, 'Board Game Night', start=START.add(days=1))
+    their_laser = discord_event(guild, 11, 'Laser Class', start=START.add(days=1))
+    their_party = discord_event(guild, 12, 'Halloween Party', start=START.add(days=3))
+    keyed_events = [
+        (sync.discord_event_key(event), event)
+        for event in (ours, ours_dropped, their_meetup, their_laser, their_party)
+    ]
+    mappings = {**mapping(woodshop, 1), **mapping(dropped, 2)}
+
+    plan = sync.plan_discord_sync(
+        [woodshop, laser], [], keyed_events, NOW, mappings, owned_event_ids={1, 2}
+    )
+
+    assert actions(plan) == [('create', None), ('delete', 2), ('noop', 1)]
+    assert [operation['cal_event']['name'] for operation in plan if operation['action'] == 'create'] == ['Laser Class']
+
+
+def test_home_guild_still_adopts_unrecorded_events(sync):
+    guild = FakeGuild(guild_id=1)
+    laser = cal_event('laser@cal', 'Laser Class')
+    existing = discord_event(guild, 10, 'Laser Class')
+
+    plan = sync.plan_discord_sync([laser], [], [(sync.discord_event_key(existing), existing)], NOW, {})
+
+    assert actions(plan) == [('noop', 10)]
+
+
+def test_partner_guild_sync_only_creates_alongside_foreign_events(sync):
+    guild = FakeGuild(guild_id=3)
+    for event in (
+        discord_event(guild, 20, 'Board Game Night'),
+        discord_event(guild, 21, 'Woodshop 101', start=START.add(days=1)),
+    ):
+        guild.events[event.id] = event
+    snapshot = {
+        'events': [cal_event('woodshop@cal', 'Woodshop 101', start=START.add(days=1))],
+        'canceled_events': [],
+    }
+
+    plan = asyncio.run(sync.sync_discord_events(guild, dry_run=True, snapshot=snapshot))
+
+    assert actions(plan) == [('create', None)]
+
+
+def test_replaced_class_at_the_same_time_is_not_renamed_into_it(sync):
+    guild = FakeGuild(guild_id=1)
+    woodshop = cal_event('woodshop@cal', 'Woodshop 101')
+    laser = cal_event('laser@cal', 'Laser Class')
+    existing = discord_event(guild, 1, 'Woodshop 101')
+
+    plan = sync.plan_discord_sync(
+        [laser], [], [(sync.discord_event_key(existing), existing)], NOW, mapping(woodshop, 1)
+    )
+
+    assert actions(plan) == [('create', None), ('delete', 1)]
+
+
+def test_moved_occurrence_is_edited_in_place_by_uid(sync):
+    guild = FakeGuild(guild_id=1)
+    woodshop = cal_event('woodshop@cal', 'Woodshop 101')
+    moved = cal_event('woodshop@cal', 'Woodshop 101', start=START.add(hours=1))
+    existing = discord_event(guild, 1, 'Woodshop 101')
+
+    plan = sync.plan_discord_sync(
+        [moved], [], [(sync.discord_event_key(existing), existing)], NOW, mapping(woodshop, 1)
+    )
+
+    assert actions(plan) == [('edit', 1)]
+    assert sorted(plan[0]['changes']) == ['end_time', 'start_time']
+
+
+def test_same_name_recorded_for_another_uid_is_not_paired(sync):
+    guild = FakeGuild(guild_id=1)
+    other = cal_event('other@cal', 'Open Hack Night', location='Main Room')
+    hack_night = cal_event('hack@cal', 'Open Hack Night')
+    existing = discord_event(guild, 1, 'Open Hack Night', location='Main Room')
+
+    plan = sync.plan_discord_sync(
+        [hack_night], [], [(sync.discord_event_key(existing), existing)], NOW, mapping(other, 1)
+    )
+
+    assert actions(plan) == [('create', None), ('delete', 1)]
+
+
+def test_event_deleted_during_a_disconnect_is_recreated_after_reconnect(sync):
+    guild = FakeGuild(guild_id=1)
+    woodshop = cal_event('woodshop@cal', 'Woodshop 101')
+    existing = discord_event(guild, 30, 'Woodshop 101')
+    guild.events[existing.id] = existing
+    sync.EVENT_STORE.record(guild.id, woodshop, existing.id)
+    snapshot = {'events': [woodshop], 'canceled_events': []}
+    assert actions(asyncio.run(sync.sync_discord_events(guild, dry_run=True, snapshot=snapshot))) == [('noop', 30)]
+
+    del guild.events[existing.id]  # Deleted while the gateway was down; no dispatch arrives
+    sync.EVENT_INDEX.mark_stale()  # What on_ready does for the new session
+
+    plan = asyncio.run(sync.sync_discord_events(guild, dry_run=True, snapshot=snapshot))
+    assert actions(plan) == [('create', None)]
+    sync.EVENT_STORE.forget(guild.id, existing.id)
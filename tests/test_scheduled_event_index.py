@@ -0,0 +1,51 @@
+import logging
+from types import SimpleNamespace
+
+from scheduled_event_index import ScheduledEventIndex
+
+
+def event(event_id, name, guild_id=1):
+    return SimpleNamespace(id=event_id, name=name, guild_id=guild_id)
+
+
+def make_index():
+    return ScheduledEventIndex(lambda scheduled_event: scheduled_event.name)
+
+
+def test_replace_seeds_guild():
+    index = make_index()
+    assert index.needs_refresh(1)
+    index.replace(1, [event(10, 'Meetup'), event(11, 'Class')])
+    assert not index.needs_refresh(1)
+    assert sorted(key for key, _ in index.keyed_events(1)) == ['Class', 'Meetup']
+
+
+def test_replace_logs_drift(caplog):
+    index = make_index()
+    index.replace(1, [event(10, 'Meetup'), event(11, 'Class'), event(12, 'Open House')])
+    index.remove(event(12, 'Open House'))  # Deleted while a dispatch was missed below
+
+    with caplog.at_level(logging.WARNING):
+        index.replace(1, [event(10, 'Meetup renamed'), event(12, 'Open House'), event(13, 'New')])
+
+    assert "drift in guild 1: 2 missing, 1 stale, 1 changed" in caplog.text
+    assert sorted(key for key, _ in index.keyed_events(1)) == ['Meetup renamed', 'New', 'Open House']
+
+
+def test_replace_without_drift_is_quiet(caplog):
+    index = make_index()
+    index.replace(1, [event(10, 'Meetup')])
+    with caplog.at_level(logging.WARNING):
+        index.replace(1, [event(10, 'Meetup')])
+    assert caplog.text == ''
+
+
+def test_mark_stale_requires_a_refresh_of_every_guild():
+    index = make_index()
+    index.replace(1, [event(10, 'Meetup')])
+    index.replace(2, [event(20, 'Class', guild_id=2)])
+
+    index.mark_stale()
+
+    assert index.needs_refresh(1) and index.needs_refresh(2)
+    assert [key for key, _ in index.keyed_events(1)] == ['Meetup']  # Still served until the refresh
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from sensor_history import SensorHistory, StateLog
+
+
+def test_sensor_first_read_as_text_turns_numeric():
+    history = SensorHistory()
+    history.record(0, "We are OPEN", [('Main Room Temp', 'Unavailable')])
+    for minute in range(1, 5):
+        history.record(minute * 60, "We are OPEN", [('Main Room Temp', f'{68 + minute}.0 °F')])
+    history.record(300, "We are OPEN", [('Main Room Temp', 'Unavailable')])  # Ignored once numeric
+
+    assert 'Main Room Temp' not in history.state_logs
+    assert history.series['Main Room Temp'].summary(0) == (69.0, 72.0, 70.5)
+    assert history.series['Main Room Temp'].unit == '°F'
+
+
+def test_state_codes_are_rebuilt_instead_of_overflowing():
+    state_log = StateLog(capacity=8, max_states=16)
+    for i in range(70_000):  # More distinct states than an 'H' code can number
+        state_log.add(i, f'state {i}')
+
+    assert len(state_log.states) <= 16
+    assert [state_log.states[code] for _, code in state_log.ring.rows()] == [f'state {i}' for i in range(69_992, 70_000)]
+    assert state_log.duration('state 69998', 0, 70_000) == 1.0
+
+
+def test_on_ready_replays_history_off_the_event_loop(status, monkeypatch, tmp_path):
+    replayed_on = []
+    history = SensorHistory()
+    monkeypatch.setattr(history, 'open_segment', lambda path: replayed_on.append(threading.current_thread()))
+    monkeypatch.setattr(status, 'SENSOR_HISTORY', history)
+    monkeypatch.setattr(status, 'SENSOR_HISTORY_LOCK', asyncio.Lock())
+    monkeypatch.setattr(status, 'loop_enabled', lambda loop: True)
+    monkeypatch.setattr(status, 'load_bot_config', lambda: {status.SENSOR_HISTORY_FILE: str(tmp_path / 'history.csv')})
+    monkeypatch.setattr(status, 'post_lab_status', SimpleNamespace(is_running=lambda: True))
+    monkeypatch.setattr(type(status.bot), 'user', SimpleNamespace(name='test bot'))
+
+    asyncio.run(status.on_ready())
+
+    assert len(replayed_on) == 1 and replayed_on[0] is not threading.main_thread()
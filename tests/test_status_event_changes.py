@@ -0,0 +1,91 @@
+import time
+from types import SimpleNamespace
+
+SENSORS = [
+    {'Sensor': 'Front Door', 'Status': 'Closed', 'Last Update': '2 min ago'},
+    {'Sensor': 'Main Room Temp', 'Status': '71.2°F', 'Last Update': 'Just now'},
+]
+IMAGE = b'png bytes'
+
+
+def existing_event(description):
+    return SimpleNamespace(id=42, name="We are OPEN", description=description)
+
+
+def render(status, sensor_data, scrape_timestamp, trends):
+    return status.format_sensor_data(
+        "We are OPEN", sensor_data, scrape_timestamp, status.LAB_URL, trends
+    )
+
+
+def test_only_end_time_moves_when_just_the_ages_and_scrape_time_change(status):
+    description = render(status, SENSORS, '2026-10-17 01:00 AM PDT', ['open 1h 05m'])
+    key = status.description_fingerprint("We are OPEN", SENSORS)
+    status.record_pushed_event(42, IMAGE, key)
+
+    later_sensors = [dict(row, **{'Last Update': '7 min ago'}) for row in SENSORS]
+    later_description = render(status, later_sensors, '2026-10-17 01:05 AM PDT', ['open 1h 10m'])
+    assert later_description != description
+
+    changes = status.status_event_changes(
+        existing_event(description), "We are OPEN", later_description,
+        status.description_fingerprint("We are OPEN", later_sensors), IMAGE
+    )
+    assert changes == {}
+
+
+def test_description_is_sent_when_a_sensor_value_changes(status):
+    description = render(status, SENSORS, '2026-10-17 01:00 AM PDT', [])
+    status.record_pushed_event(42, IMAGE, status.description_fingerprint("We are OPEN", SENSORS))
+
+    warmer = [SENSORS[0], dict(SENSORS[1], Status='73.0°F')]
+    warmer_description = render(status, warmer, '2026-10-17 01:05 AM PDT', [])
+    changes = status.status_event_changes(
+        existing_event(description), "We are OPEN", warmer_description,
+        status.description_fingerprint("We are OPEN", warmer), IMAGE
+    )
+    assert changes == {'description': warmer_description}
+
+
+def test_status_change_sends_name_and_description(status):
+    description = render(status, SENSORS, '2026-10-17 01:00 AM PDT', [])
+    status.record_pushed_event(42, IMAGE, status.description_fingerprint("We are OPEN", SENSORS))
+
+    closed_description = status.format_sensor_data(
+        "We are CLOSED", SENSORS, '2026-10-17 01:05 AM PDT', status.LAB_URL
+    )
+    changes = status.status_event_changes(
+        existing_event(description), "We are CLOSED", closed_description,
+        status.description_fingerprint("We are CLOSED", SENSORS), IMAGE
+    )
+    assert changes == {'name': "We are CLOSED", 'description': closed_description}
+
+
+def test_everything_is_sent_to_an_event_this_process_has_not_written(status):
+    status.record_pushed_event(7, IMAGE, status.description_fingerprint("We are OPEN", SENSORS))
+    description = render(status, SENSORS, '2026-10-17 01:00 AM PDT', [])
+
+    changes = status.status_event_changes(
+        existing_event(description), "We are OPEN", description,
+        status.description_fingerprint("We are OPEN", SENSORS), IMAGE
+    )
+    assert changes == {'description': description, 'image': IMAGE}
+
+
+def test_unchanged_description_is_refreshed_once_it_is_old(status):
+    key = status.description_fingerprint("We are OPEN", SENSORS)
+    status.record_pushed_event(42, IMAGE, key)
+    status.pushed_description_fingerprints[42] = (key, time.monotonic() - status.DESCRIPTION_REFRESH_SECONDS)
+    later_description = render(status, SENSORS, '2026-10-17 01:35 AM PDT', ['open 1h 40m'])
+
+    changes = status.status_event_changes(existing_event(''), "We are OPEN", later_description, key, IMAGE)
+    assert changes == {'description': later_description}
+
+
+def test_edit_without_description_keeps_the_last_push_time(status):
+    key = status.description_fingerprint("We are OPEN", SENSORS)
+    status.record_pushed_event(42, IMAGE, key)
+    pushed = status.pushed_description_fingerprints[42]
+
+    status.record_pushed_event(42, IMAGE)  # An end_time-only edit
+    assert status.pushed_description_fingerprints[42] == pushed